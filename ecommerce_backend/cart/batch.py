@@ -0,0 +1,154 @@
+from django.db import transaction
+
+from products.models import Product
+from .models import CartItem
+from .reservations import with_available_stock, hold, release
+
+
+MAX_QUANTITY = 5
+OPERATIONS = ("add", "set", "remove")
+
+
+class CartBatchError(Exception):
+    def __init__(self, errors):
+        super().__init__("Invalid cart operations")
+        self.errors = errors
+
+
+def parse_operations(raw_operations):
+    """
+    Validate [{"product_id", "quantity", "op"}] into (index, product_id, quantity, op) tuples
+    """
+    if not isinstance(raw_operations, list) or not raw_operations:
+        raise CartBatchError([{"error": "items must be a non-empty list"}])
+
+    operations = []
+    errors = []
+    for index, raw in enumerate(raw_operations):
+        try:
+            product_id = int(raw["product_id"])
+            op = str(raw.get("op", "add")).lower()
+            quantity = int(raw.get("quantity", 1)) if op != "remove" else 0
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errors.append({"index": index, "error": "product_id and an integer quantity are required"})
+            continue
+
+        if op not in OPERATIONS:
+            errors.append({"index": index, "product_id": product_id, "error": f"op must be one of {', '.join(OPERATIONS)}"})
+        elif op == "add" and not 1 <= quantity <= MAX_QUANTITY:
+            errors.append({"index": index, "product_id": product_id, "error": "Quantity must be between 1 and 5"})
+        elif op == "set" and not 0 <= quantity <= MAX_QUANTITY:
+            errors.append({"index": index, "product_id": product_id, "error": "Quantity must be between 0 and 5"})
+        else:
+            operations.append((index, product_id, quantity, op))
+
+    if errors:
+        raise CartBatchError(errors)
+    return operations
+
+
+def apply_cart_operations(cart, raw_operations, clamp=False):
+    """
+    Validate and apply a list of cart line operations all-or-nothing.
+    With clamp=True (guest cart merge) unknown products are skipped and
+    quantities are cut down to available stock instead of failing.
+
+    Everything runs in one transaction under the cart's row lock (Cart.lock):
+    products (with available stock and images) are fetched with one in_bulk call,
+    the cart's existing lines with one query, and the result is written with
+    bulk_create / bulk_update / one delete.
+    Returns one CartItem per distinct product in request order (quantity 0 when removed).
+    """
+    operations = parse_operations(raw_operations)
+    product_ids = {product_id for _, product_id, _, _ in operations}
+
+    with transaction.atomic():
+        cart.lock()
+
+        products = with_available_stock(
+            Product.objects.prefetch_related("images"), cart
+        ).in_bulk(product_ids)
+        existing = {
+            item.product_id: item
+            for item in CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+        }
+
+        quantities = {product_id: item.quantity for product_id, item in existing.items()}
+        errors = []
+
+        for index, product_id, quantity, op in operations:
+            product = products.get(product_id)
+            current = quantities.get(product_id, 0)
+
+            if op == "remove":
+                quantities[product_id] = 0
+                continue
+
+            if product is None or (not product.is_active and op == "add"):
+                if not clamp:
+                    errors.append({"index": index, "product_id": product_id, "error": "Product not found"})
+                continue
+
+            wanted = current + quantity if op == "add" else quantity
+            if wanted > 0 and product.available_stock < wanted and not clamp:
+                errors.append({
+                    "index": index,
+                    "product_id": product_id,
+                    "error": f"Insufficient stock. Available: {product.available_stock}",
+                    "available_quantity": product.available_stock,
+                })
+                continue
+
+            quantities[product_id] = max(min(wanted, MAX_QUANTITY, product.available_stock), 0)
+
+        if errors:
+            raise CartBatchError(errors)
+
+        to_create = []
+        to_update = []
+        to_delete = []
+        holds = {}
+        delta_quantity = 0
+        delta_amount = 0
+
+        for product_id, quantity in quantities.items():
+            item = existing.get(product_id)
+            previous = item.quantity if item else 0
+            if quantity == previous:
+                continue
+
+            product = products.get(product_id)
+            if product is not None:
+                delta_quantity += quantity - previous
+                delta_amount += (quantity - previous) * product.price
+
+            if quantity == 0:
+                to_delete.append(product_id)
+            elif item is None:
+                to_create.append(CartItem(cart=cart, product=product, quantity=quantity))
+                holds[product_id] = quantity
+            else:
+                item.quantity = quantity
+                to_update.append(item)
+                holds[product_id] = quantity
+
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ["quantity"])
+        if to_delete:
+            CartItem.objects.filter(cart=cart, product_id__in=to_delete).delete()
+            release(cart, to_delete)
+        if holds:
+            hold(cart, holds)
+        cart.adjust_totals(delta_quantity, delta_amount)
+
+    lines = []
+    seen = set()
+    for _, product_id, _, _ in operations:
+        product = products.get(product_id)
+        if product is None or product_id in seen:
+            continue
+        seen.add(product_id)
+        lines.append(CartItem(cart=cart, product=product, quantity=quantities.get(product_id, 0)))
+    return lines
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Prefetch, Value, When
+
+from orders.models import Order, OrderItem
+from products.models import Product, ProductImage
+from reports.rollups import record_order
+from .models import Cart
+from .reservations import held_by_others, with_available_stock, release
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, product_id=None):
+        super().__init__(message)
+        self.product_id = product_id
+
+    def as_response_data(self):
+        data = {"error": str(self)}
+        if self.product_id is not None:
+            data["product_id"] = self.product_id
+        return data
+
+
+def insufficient_stock_error(product, available):
+    return CheckoutError(
+        f"Insufficient stock for {product.name}. Available: {available}",
+        product_id=product.id,
+    )
+
+
+def place_order(user):
+    """
+    Turn the user's cart into an order in one transaction.
+
+    The cart row is locked so a double submit can't order it twice, and stock is
+    decremented for every line in a single conditional UPDATE
+    (stock = stock - n WHERE stock >= n + units held by other carts).
+    If any line loses the race the whole transaction rolls back, so concurrent
+    checkouts can never oversell.
+    """
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        if cart is None:
+            raise CheckoutError("Cart is empty")
+
+        items = list(
+            cart.items
+            .select_related("product")
+            # Ordered, so the snapshot's primary image is the product's first one
+            .prefetch_related(Prefetch("product__images", queryset=ProductImage.objects.order_by("id")))
+        )
+        if not items:
+            raise CheckoutError("Cart is empty")
+
+        quantities = {item.product_id: item.quantity for item in items}
+
+        # Cheap pre-check (stock minus other carts' holds), for a friendly error
+        available = dict(
+            with_available_stock(Product.objects.filter(pk__in=quantities.keys()), cart)
+            .values_list("id", "available_stock")
+        )
+        for item in items:
+            if available.get(item.product_id, 0) < item.quantity:
+                raise insufficient_stock_error(item.product, available.get(item.product_id, 0))
+
+        requested = Case(
+            *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            output_field=IntegerField(),
+        )
+        updated = (
+            Product.objects
+            .filter(pk__in=quantities.keys(), stock__gte=requested + held_by_others(cart))
+            .update(stock=F("stock") - requested)
+        )
+
+        if updated != len(quantities):
+            # Someone else bought or reserved the last units between the read and the update
+            current = dict(
+                with_available_stock(Product.objects.filter(pk__in=quantities.keys()), cart)
+                .values_list("id", "available_stock")
+            )
+            for item in items:
+                if current.get(item.product_id, 0) < item.quantity:
+                    raise insufficient_stock_error(item.product, current.get(item.product_id, 0))
+            raise CheckoutError("Stock changed during checkout, please retry")
+
+        order = Order.objects.create(
+            user=user,
+            total_amount=sum(item.product.price * item.quantity for item in items),
+            status="pending"
+        )
+
+        order_items = []
+        for item in items:
+            order_item = OrderItem(
+                order=order,
+                product=item.product,
+                quantity=item.quantity,
+                price=item.product.price
+            )
+            order_item.snapshot_product(item.product)
+            order_items.append(order_item)
+        OrderItem.objects.bulk_create(order_items)
+        record_order(order, order_items)
+
+        cart.items.all().delete()
+        release(cart)
+        cart.reset_totals()
+
+    return order
@@ -0,0 +1,66 @@
+from django.core import signing
+
+from .batch import apply_cart_operations
+from .models import Cart
+
+
+GUEST_CART_COOKIE = "guest_cart"
+GUEST_CART_SALT = "cart.guest"
+GUEST_CART_MAX_AGE = 60 * 60 * 24 * 30  # 30 days
+
+
+def read_guest_cart(request):
+    """
+    {product_id: quantity} from the signed guest cart cookie ({} if missing or tampered)
+    """
+    raw = request.COOKIES.get(GUEST_CART_COOKIE)
+    if not raw:
+        return {}
+
+    try:
+        pairs = signing.loads(raw, salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE)
+        return {int(product_id): int(quantity) for product_id, quantity in pairs if int(quantity) > 0}
+    except (signing.BadSignature, TypeError, ValueError):
+        return {}
+
+
+def write_guest_cart(response, request, items):
+    if not items:
+        response.delete_cookie(GUEST_CART_COOKIE)
+        return
+
+    # Compact [[id, qty], ...] payload, zlib-compressed when that is shorter
+    value = signing.dumps(
+        [[product_id, quantity] for product_id, quantity in items.items()],
+        salt=GUEST_CART_SALT,
+        compress=True,
+    )
+    response.set_cookie(
+        key=GUEST_CART_COOKIE,
+        value=value,
+        httponly=True,
+        secure=request.is_secure(),
+        samesite="Lax",
+        max_age=GUEST_CART_MAX_AGE,
+    )
+
+
+def merge_guest_cart(request, response, user):
+    """
+    Fold the guest cart into the user's Cart as one batch add (clamped to stock)
+    and drop the cookie
+    """
+    items = read_guest_cart(request)
+    if not items:
+        return
+
+    cart, created = Cart.objects.get_or_create(user=user)
+    apply_cart_operations(
+        cart,
+        [
+            {"product_id": product_id, "quantity": quantity, "op": "add"}
+            for product_id, quantity in items.items()
+        ],
+        clamp=True,
+    )
+    response.delete_cookie(GUEST_CART_COOKIE)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cart.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired cart stock reservations (once, or every --interval seconds)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and sweep every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+
+        while True:
+            released = release_expired()
+            self.stdout.write(f"Released {released} expired reservations")
+
+            if interval <= 0:
+                break
+            time.sleep(interval)
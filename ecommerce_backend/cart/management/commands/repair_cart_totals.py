@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from cart.models import Cart, CartItem
+
+
+def actual_item_count():
+    return Coalesce(
+        Subquery(
+            CartItem.objects.filter(cart=OuterRef("pk"))
+            .order_by()
+            .values("cart")
+            .annotate(total=Sum("quantity"))
+            .values("total")[:1]
+        ),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def actual_subtotal():
+    return Coalesce(
+        Subquery(
+            CartItem.objects.filter(cart=OuterRef("pk"))
+            .order_by()
+            .values("cart")
+            .annotate(total=Sum(F("quantity") * F("product__price")))
+            .values("total")[:1]
+        ),
+        Value(0),
+        output_field=DecimalField(max_digits=15, decimal_places=5),
+    )
+
+
+class Command(BaseCommand):
+    help = "Find carts whose item_count/subtotal drifted from their items and repair them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted carts")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Cart.objects
+            .annotate(actual_count=actual_item_count(), actual_subtotal=actual_subtotal())
+            .exclude(item_count=F("actual_count"), subtotal=F("actual_subtotal"))
+            .values_list("id", flat=True)
+        )
+
+        self.stdout.write(f"{len(drifted)} carts with drifted totals")
+        if options["dry_run"] or not drifted:
+            return
+
+        batch_size = options["batch_size"]
+        for start in range(0, len(drifted), batch_size):
+            Cart.objects.filter(pk__in=drifted[start:start + batch_size]).update(
+                item_count=actual_item_count(),
+                subtotal=actual_subtotal(),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} carts"))
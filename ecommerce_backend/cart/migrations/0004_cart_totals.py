@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:59
+
+from django.db import migrations, models
+
+
+def backfill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('cart', 'Cart')
+    CartItem = apps.get_model('cart', 'CartItem')
+
+    totals = (
+        CartItem.objects
+        .values('cart_id')
+        .annotate(
+            item_count=models.Sum('quantity'),
+            subtotal=models.Sum(models.F('quantity') * models.F('product__price')),
+        )
+    )
+    for row in totals:
+        Cart.objects.filter(pk=row['cart_id']).update(
+            item_count=row['item_count'],
+            subtotal=row['subtotal'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=5, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
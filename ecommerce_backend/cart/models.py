@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import connections, models
+from django.utils import timezone
 from users.models import User
 from products.models import Product
 
@@ -9,6 +10,10 @@ class Cart(models.Model):
         on_delete=models.CASCADE,
         related_name="cart"
     )
+    # Running totals, kept up to date by the cart views with F-expressions.
+    # repair_cart_totals recomputes them from the items if they drift.
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=15, decimal_places=5, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,8 +22,108 @@ class Cart(models.Model):
 
     @property
     def total_price(self):
-        return sum(item.subtotal for item in self.items.all())
+        total = self.items.aggregate(
+            total=models.Sum(models.F("quantity") * models.F("product__price"))
+        )["total"]
+        return total or 0
+
+    def lock(self):
+        """
+        Take the cart's row lock; every change to its lines holds it until commit.
+        Call inside transaction.atomic()
+        """
+        Cart.objects.select_for_update().filter(pk=self.pk).values_list("pk", flat=True).first()
+
+    def adjust_totals(self, quantity, amount):
+        """
+        Apply a change of `quantity` units worth `amount` in a single UPDATE
+        """
+        if not quantity and not amount:
+            return
+        Cart.objects.filter(pk=self.pk).update(
+            item_count=models.F("item_count") + quantity,
+            subtotal=models.F("subtotal") + amount,
+            updated_at=timezone.now(),
+        )
+
+    def reset_totals(self):
+        Cart.objects.filter(pk=self.pk).update(item_count=0, subtotal=0, updated_at=timezone.now())
     
+class CartItemManager(models.Manager):
+    def add_quantity(self, cart, product_id, quantity, available, limit, price):
+        """
+        Add `quantity` to the cart's line for a product with one
+        INSERT ... ON CONFLICT (cart, product) DO UPDATE, capping the line at `limit`,
+        then hold the new quantity for the cart and move its running totals.
+
+        An existing line is only updated while existing + quantity <= available.
+        On PostgreSQL the upsert, the hold and the totals update are a single
+        statement (data-modifying CTEs); elsewhere they run one after another.
+        Call inside transaction.atomic() holding cart.lock(), so the previous
+        quantity read next to the upsert is the one it replaces.
+        Returns (item id, new quantity, previous quantity), or None when the
+        update was refused for lack of stock.
+        """
+        from .reservations import hold, reservation_ttl
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        least = "MIN" if connection.vendor == "sqlite" else "LEAST"
+
+        upsert = (
+            f"INSERT INTO {table} ({qn('cart_id')}, {qn('product_id')}, {qn('quantity')}) "
+            f"VALUES (%s, %s, %s) "
+            f"ON CONFLICT ({qn('cart_id')}, {qn('product_id')}) DO UPDATE "
+            f"SET {qn('quantity')} = {least}({table}.{qn('quantity')} + %s, %s) "
+            f"WHERE {table}.{qn('quantity')} + %s <= %s "
+        )
+        params = [cart.pk, product_id, min(quantity, limit), quantity, limit, quantity, available]
+
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                reservations = qn(StockReservation._meta.db_table)
+                carts = qn(Cart._meta.db_table)
+                previous = f"COALESCE((SELECT {qn('quantity')} FROM previous), 0)"
+                now = timezone.now()
+                cursor.execute(
+                    f"WITH previous AS ("
+                    f"SELECT {qn('quantity')} FROM {table} "
+                    f"WHERE {qn('cart_id')} = %s AND {qn('product_id')} = %s), "
+                    f"line AS ({upsert}RETURNING {qn('id')}, {qn('quantity')}), "
+                    f"held AS ("
+                    f"INSERT INTO {reservations} "
+                    f"({qn('cart_id')}, {qn('product_id')}, {qn('quantity')}, {qn('expires_at')}) "
+                    f"SELECT %s, %s, line.{qn('quantity')}, CAST(%s AS timestamp with time zone) FROM line "
+                    f"ON CONFLICT ({qn('cart_id')}, {qn('product_id')}) DO UPDATE "
+                    f"SET {qn('quantity')} = EXCLUDED.{qn('quantity')}, "
+                    f"{qn('expires_at')} = EXCLUDED.{qn('expires_at')}), "
+                    f"totals AS ("
+                    f"UPDATE {carts} "
+                    f"SET {qn('item_count')} = {qn('item_count')} + line.{qn('quantity')} - {previous}, "
+                    f"{qn('subtotal')} = {qn('subtotal')} + (line.{qn('quantity')} - {previous}) * %s, "
+                    f"{qn('updated_at')} = %s "
+                    f"FROM line WHERE {carts}.{qn('id')} = %s) "
+                    f"SELECT line.{qn('id')}, line.{qn('quantity')}, {previous} FROM line",
+                    [cart.pk, product_id]
+                    + params
+                    + [cart.pk, product_id, now + reservation_ttl()]
+                    + [price, now, cart.pk],
+                )
+                return cursor.fetchone()
+
+            previous = self.filter(cart=cart, product_id=product_id).values_list("quantity", flat=True).first() or 0
+            cursor.execute(f"{upsert}RETURNING {qn('id')}, {qn('quantity')}", params)
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+        item_id, new_quantity = row
+        hold(cart, {product_id: new_quantity})
+        cart.adjust_totals(new_quantity - previous, (new_quantity - previous) * price)
+        return item_id, new_quantity, previous
+
+
 class CartItem(models.Model):
     cart = models.ForeignKey(
         Cart,
@@ -31,6 +136,8 @@ class CartItem(models.Model):
     )
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemManager()
+
     class Meta:
         unique_together = [['cart', 'product']]
 
@@ -43,4 +150,34 @@ class CartItem(models.Model):
     
     # @property
     # def total_price(self):
-    #     return sum(item.subtotal for item in self.items.all())
\ No newline at end of file
+    #     return sum(item.subtotal for item in self.items.all())
+
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for a cart until expires_at.
+    Expired rows are ignored by availability checks and swept by
+    the release_expired_reservations command.
+    """
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name="reservations"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservations"
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [['cart', 'product']]
+        indexes = [
+            models.Index(fields=["product", "expires_at"], name="reservation_product_exp_idx"),
+            models.Index(fields=["expires_at"], name="reservation_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} until {self.expires_at}"
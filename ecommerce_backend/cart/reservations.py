@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockReservation
+
+
+def reservation_ttl():
+    return getattr(settings, "CART_RESERVATION_TTL", timedelta(minutes=15))
+
+
+def held_by_others(cart=None, product_ref=OuterRef("pk")):
+    """
+    Subquery: units of a product held by live reservations of other carts
+    """
+    holds = StockReservation.objects.filter(product=product_ref, expires_at__gt=timezone.now())
+    if cart is not None:
+        holds = holds.exclude(cart=cart)
+
+    return Coalesce(
+        Subquery(
+            holds.order_by()
+            .values("product")
+            .annotate(total=Sum("quantity"))
+            .values("total")[:1]
+        ),
+        0,
+    )
+
+
+def with_available_stock(queryset, cart=None):
+    """
+    Annotate products with `available_stock`: stock minus other carts' live holds.
+    Product and availability come back in the same single query.
+    """
+    return queryset.annotate(available_stock=F("stock") - held_by_others(cart))
+
+
+def hold(cart, quantities):
+    """
+    Create or refresh holds for {product_id: quantity} in one upsert
+    """
+    expires_at = timezone.now() + reservation_ttl()
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(cart=cart, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in quantities.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["cart", "product"],
+        update_fields=["quantity", "expires_at"],
+    )
+
+
+def release(cart, product_ids=None):
+    holds = StockReservation.objects.filter(cart=cart)
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=product_ids)
+    holds.delete()
+
+
+def release_expired():
+    deleted, _ = StockReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -60,10 +60,10 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ["id", "items", "total_price", "total_items", "created_at", "updated_at"]
 
     def get_total_price(self, obj):
-        return float(obj.total_price)
+        return float(obj.subtotal)
     
     def get_total_items(self, obj):
-        return obj.items.aggregate(total=serializers.models.Sum('quantity'))['total'] or 0
+        return obj.item_count
 
 
 class CartItemSimpleSerializer(serializers.Serializer):
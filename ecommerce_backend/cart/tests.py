@@ -1,3 +1,421 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import slugify
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product, ProductImage
+from users.models import User
+
+from .checkout import CheckoutError, place_order
+from .guest import GUEST_CART_COOKIE
+from .models import Cart, CartItem, StockReservation
+
+
+def logged_in_client(email):
+    User.objects.create_user(email=email, username=email.split("@")[0], password="pass12345")
+    client = Client()
+    response = client.post(
+        "/api/users/login/", {"email": email, "password": "pass12345"}, content_type="application/json"
+    )
+    assert response.status_code == 200, response.content
+    return client
+
+
+def assert_totals_match_lines(testcase, cart):
+    cart.refresh_from_db()
+    lines = list(cart.items.select_related("product"))
+    testcase.assertEqual(cart.item_count, sum(line.quantity for line in lines))
+    testcase.assertEqual(cart.subtotal, sum(line.subtotal for line in lines))
+
+
+def create_product(name="Saree", price=250, stock=20, images=0):
+    """
+    Active product in the shared Silk category, with `images` ProductImage rows
+    """
+    category, _ = Category.objects.get_or_create(name="Silk", slug="silk")
+    product = Product.objects.create(
+        name=name, slug=slugify(name), description="", category=category, price=price, stock=stock
+    )
+    for i in range(images):
+        ProductImage.objects.create(product=product, image=f"products/{product.slug}-{i}.jpg")
+    return product
+
+
+def same_session(client):
+    """
+    New Client carrying another client's access token (one per thread)
+    """
+    thread_client = Client()
+    thread_client.cookies["access_token"] = client.cookies["access_token"].value
+    return thread_client
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(f"/api/cart/{url}", data, content_type="application/json")
+
+
+def guest_cart_cookie(items):
+    client = Client()
+    for product_id, quantity in items.items():
+        send(client, "post", "guest-cart/", {"product_id": product_id, "quantity": quantity})
+    return client.cookies[GUEST_CART_COOKIE].value
+
+
+def run_together(count, target):
+    """
+    Start `count` threads calling target(i) at the same moment, each on its own connection
+    """
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        try:
+            barrier.wait()
+            target(i)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class CartTotalsTests(TestCase):
+    def setUp(self):
+        self.product = create_product()
+        self.client = logged_in_client("buyer@example.com")
+
+    def test_totals_follow_add_update_remove(self):
+        send(self.client, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": 2})
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        assert_totals_match_lines(self, cart)
+
+        for quantity in (5, 1, 3, 0):
+            response = send(self.client, "patch", "cart-update/", {"product_id": self.product.pk, "quantity": quantity})
+            self.assertEqual(response.status_code, 200)
+            assert_totals_match_lines(self, cart)
+
+        self.assertEqual(cart.item_count, 0)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = logged_in_client("buyer@example.com")
+        self.user = User.objects.get(email="buyer@example.com")
+        self.product = create_product()
+
+    def test_order_snapshot_takes_the_first_image(self):
+        # Inserted out of id order, so an unordered prefetch would see 50 first
+        ProductImage.objects.create(pk=50, product=self.product, image="products/saree-back.jpg")
+        ProductImage.objects.create(pk=10, product=self.product, image="products/saree-front.jpg")
+        self.client.post("/api/cart/add-to-cart/", {"product_id": self.product.pk}, content_type="application/json")
+
+        order = place_order(self.user)
+
+        self.assertTrue(order.items.get().product_image.endswith("products/saree-front.jpg"))
+
+
+class StockReservationTests(TestCase):
+    """
+    A rival cart holds 4 of the 5 units in stock
+    """
+
+    def setUp(self):
+        self.product = create_product(stock=5)
+        self.rival = logged_in_client("rival@example.com")
+        response = send(self.rival, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": 4})
+        self.assertEqual(response.status_code, 201)
+        self.client = logged_in_client("buyer@example.com")
+        self.buyer = User.objects.get(email="buyer@example.com")
+
+    def add(self, quantity):
+        return send(self.client, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": quantity})
+
+    def expire_rival_hold(self):
+        StockReservation.objects.filter(cart__user__email="rival@example.com").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_live_hold_of_another_cart_reduces_availability(self):
+        response = self.add(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["available_quantity"], 1)
+        self.assertEqual(self.add(1).status_code, 201)
+
+        response = send(self.client, "patch", "cart-update/", {"product_id": self.product.pk, "quantity": 2})
+        self.assertEqual(response.status_code, 400)
+
+        # The rival takes the last unit after our line was added
+        StockReservation.objects.filter(cart__user__email="rival@example.com").update(quantity=5)
+        with self.assertRaises(CheckoutError):
+            place_order(self.buyer)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_expired_holds_are_ignored(self):
+        self.expire_rival_hold()
+
+        self.assertEqual(self.add(3).status_code, 201)
+        response = send(self.client, "patch", "cart-update/", {"product_id": self.product.pk, "quantity": 5})
+        self.assertEqual(response.status_code, 200)
+        place_order(self.buyer)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    def test_release_expired_reservations_deletes_only_expired_holds(self):
+        self.assertEqual(self.add(1).status_code, 201)
+        self.expire_rival_hold()
+
+        out = StringIO()
+        call_command("release_expired_reservations", stdout=out)
+
+        self.assertIn("Released 1 expired reservations", out.getvalue())
+        self.assertEqual(
+            list(StockReservation.objects.values_list("cart__user__email", "quantity")),
+            [("buyer@example.com", 1)],
+        )
+
+
+class AddToCartTests(TestCase):
+    def setUp(self):
+        self.product = create_product(stock=4, images=2)
+        self.client = logged_in_client("buyer@example.com")
+
+    def test_repeated_adds_upsert_line_hold_and_totals(self):
+        first = send(self.client, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": 2})
+        second = send(self.client, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": 1})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json()["quantity"], 3)
+        self.assertEqual(len(second.json()["product_images"]), 2)
+
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        self.assertEqual(cart.items.get().quantity, 3)
+        self.assertEqual(StockReservation.objects.get(cart=cart).quantity, 3)
+        assert_totals_match_lines(self, cart)
+
+        refused = send(self.client, "post", "add-to-cart/", {"product_id": self.product.pk, "quantity": 2})
+        self.assertEqual(refused.status_code, 400)
+        self.assertEqual(refused.json()["current_quantity"], 3)
+        assert_totals_match_lines(self, cart)
+
+
+    def test_token_of_deleted_user_writes_nothing(self):
+        User.objects.filter(email="buyer@example.com").delete()
+
+        response = self.client.post(
+            "/api/cart/add-to-cart/", {"product_id": self.product.pk, "quantity": 1}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+        # Trusted-claims read still answers, without creating a cart
+        response = self.client.get("/api/cart/cart-list")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [])
+        self.assertFalse(Cart.objects.exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "counts the single upsert statement used on PostgreSQL")
+class AddToCartQueryCountTests(TransactionTestCase):
+    def test_add_to_cart_takes_three_queries(self):
+        product = create_product(images=2)
+        client = logged_in_client("buyer@example.com")
+        send(client, "post", "add-to-cart/", {"product_id": product.pk, "quantity": 1})
+
+        # Cart lock, product with stock and images, upsert + hold + totals
+        # (psycopg also logs the transaction's BEGIN / COMMIT, which aren't counted)
+        with CaptureQueriesContext(connection) as captured:
+            response = send(client, "post", "add-to-cart/", {"product_id": product.pk, "quantity": 2})
+        statements = [query["sql"] for query in captured if query["sql"] not in ("BEGIN", "COMMIT")]
+        self.assertEqual(len(statements), 3, statements)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["quantity"], 3)
+        self.assertEqual(len(response.json()["product_images"]), 2)
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        self.assertEqual(StockReservation.objects.get(cart=cart).quantity, 3)
+        assert_totals_match_lines(self, cart)
+
+    def test_concurrent_adds_keep_totals_consistent(self):
+        product = create_product()
+        client = logged_in_client("buyer@example.com")
+        send(client, "post", "add-to-cart/", {"product_id": product.pk, "quantity": 1})
+
+        def add(i):
+            send(same_session(client), "post", "add-to-cart/", {"product_id": product.pk, "quantity": 1})
+
+        run_together(8, add)
+
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        self.assertEqual(cart.items.get().quantity, 5)
+        assert_totals_match_lines(self, cart)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs row locking under real concurrency")
+class CartUpdateConcurrencyTests(TransactionTestCase):
+    def test_concurrent_updates_keep_totals_consistent(self):
+        product = create_product()
+        client = logged_in_client("buyer@example.com")
+        send(client, "post", "add-to-cart/", {"product_id": product.pk, "quantity": 1})
+        cart = Cart.objects.get(user__email="buyer@example.com")
+
+        def patch(i):
+            send(same_session(client), "patch", "cart-update/", {"product_id": product.pk, "quantity": 2 + i % 4})
+
+        run_together(8, patch)
+
+        assert_totals_match_lines(self, cart)
+
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        self.products = [create_product(f"Saree {i}", price=100 + i, stock=3) for i in range(3)]
+
+    def test_batch_keeps_totals_and_rejects_whole_batch(self):
+        client = logged_in_client("buyer@example.com")
+        first, second, third = self.products
+        response = send(client, "post", "cart-batch/", {"items": [
+            {"product_id": first.pk, "quantity": 2},
+            {"product_id": second.pk, "quantity": 1},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        assert_totals_match_lines(self, cart)
+
+        response = send(client, "post", "cart-batch/", {"items": [
+            {"product_id": first.pk, "quantity": 1, "op": "set"},
+            {"product_id": third.pk, "quantity": 4},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(cart.items.get(product=first).quantity, 2)
+        assert_totals_match_lines(self, cart)
+
+    def test_batch_body_must_be_an_object(self):
+        client = logged_in_client("buyer@example.com")
+        for body in ([{"product_id": self.products[0].pk, "quantity": 1}], {"items": "nope"}):
+            with self.subTest(body=body):
+                response = send(client, "post", "cart-batch/", body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_login_merges_guest_cart_clamped_to_stock(self):
+        cookie = guest_cart_cookie({self.products[0].pk: 3, self.products[1].pk: 1})
+        client = logged_in_client("buyer@example.com")
+        send(client, "post", "add-to-cart/", {"product_id": self.products[0].pk, "quantity": 2})
+
+        client.cookies[GUEST_CART_COOKIE] = cookie
+        response = client.post(
+            "/api/users/login/", {"email": "buyer@example.com", "password": "pass12345"},
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        cart = Cart.objects.get(user__email="buyer@example.com")
+        self.assertEqual(cart.items.get(product=self.products[0]).quantity, 3)
+        self.assertEqual(cart.items.get(product=self.products[1]).quantity, 1)
+        assert_totals_match_lines(self, cart)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs row locking under real concurrency")
+class CartBatchConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.products = [create_product(f"Saree {i}", price=100 + i, stock=50) for i in range(2)]
+
+    def test_batches_and_adds_on_new_lines_never_fail(self):
+        client = logged_in_client("buyer@example.com")
+        statuses = []
+
+        def change(i):
+            thread_client = same_session(client)
+            if i % 2:
+                response = send(thread_client, "post", "add-to-cart/", {"product_id": self.products[0].pk, "quantity": 1})
+            else:
+                response = send(thread_client, "post", "cart-batch/", {"items": [
+                    {"product_id": product.pk, "quantity": 1} for product in self.products
+                ]})
+            statuses.append(response.status_code)
+
+        run_together(8, change)
+
+        self.assertTrue(all(code < 500 for code in statuses), statuses)
+        assert_totals_match_lines(self, Cart.objects.get(user__email="buyer@example.com"))
+
+    def test_double_submitted_login_merges_without_error(self):
+        logged_in_client("buyer@example.com")
+        cookie = guest_cart_cookie({product.pk: 2 for product in self.products})
+        statuses = []
+
+        def login(i):
+            thread_client = Client()
+            thread_client.cookies[GUEST_CART_COOKIE] = cookie
+            response = thread_client.post(
+                "/api/users/login/", {"email": "buyer@example.com", "password": "pass12345"},
+                content_type="application/json"
+            )
+            statuses.append(response.status_code)
+
+        run_together(4, login)
+
+        self.assertEqual(statuses, [200] * 4)
+        assert_totals_match_lines(self, Cart.objects.get(user__email="buyer@example.com"))
+
+
+@skipUnless(connection.vendor == "postgresql", "needs row locking under real concurrency")
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """
+    Many threads check out carts competing for the last units at once:
+    exactly the available stock is sold, never more.
+    """
+    buyers = 40
+
+    def setUp(self):
+        self.scarce = create_product("Scarce", price=100, stock=10)
+        self.plenty = create_product("Plenty", price=50, stock=1000)
+        self.users = []
+        for i in range(self.buyers):
+            user = User.objects.create_user(email=f"buyer{i}@example.com", username=f"buyer{i}", password="x")
+            cart = Cart.objects.create(user=user)
+            # Every cart wants one scarce unit plus a line that is never short
+            CartItem.objects.create(cart=cart, product=self.scarce, quantity=1)
+            CartItem.objects.create(cart=cart, product=self.plenty, quantity=2)
+            self.users.append(user)
+
+    def test_no_oversell_under_concurrent_checkouts(self):
+        results = []
+        lock = threading.Lock()
+
+        def buy(i):
+            try:
+                place_order(self.users[i])
+                outcome = "ordered"
+            except CheckoutError:
+                outcome = "refused"
+            with lock:
+                results.append(outcome)
+
+        started = time.perf_counter()
+        run_together(self.buyers, buy)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), self.buyers)
+        self.assertEqual(results.count("ordered"), 10)
+
+        self.scarce.refresh_from_db()
+        self.plenty.refresh_from_db()
+        self.assertEqual(self.scarce.stock, 0)
+        # All-or-nothing: refused carts didn't take their other line either
+        self.assertEqual(self.plenty.stock, 1000 - 2 * 10)
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual(OrderItem.objects.filter(product=self.scarce).count(), 10)
+
+        print(f"\n{self.buyers} concurrent checkouts in {elapsed:.2f}s, {self.buyers / elapsed:.0f} orders/sec")
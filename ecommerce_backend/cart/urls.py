@@ -1,7 +1,10 @@
 from django.urls import path
 from .views import (
     CartAPIView,
+    GuestCartAPIView,
+    CartSummaryAPIView,
     AddToCartAPIView,
+    BatchCartAPIView,
     UpdateCartAPIView,
     RemoveFromCartAPIView,
     ClearCartAPIView,
@@ -13,9 +16,18 @@ urlpatterns = [
     # Get logged-in user's cart
     path("cart-list", CartAPIView.as_view(), name="view-cart"),
 
+    # Guest (anonymous) cart kept in a signed cookie
+    path("guest-cart/", GuestCartAPIView.as_view(), name="guest-cart"),
+
+    # Cart badge totals (item count + subtotal)
+    path("cart-summary/", CartSummaryAPIView.as_view(), name="cart-summary"),
+
     # Add product to cart
     path("add-to-cart/", AddToCartAPIView.as_view(), name="add-to-cart"),
 
+    # Add / set / remove several lines in one request
+    path("cart-batch/", BatchCartAPIView.as_view(), name="batch-cart"),
+
     # Update cart item quantity
     path("cart-update/", UpdateCartAPIView.as_view(), name="update-cart"),
 
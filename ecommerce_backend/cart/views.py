@@ -1,11 +1,17 @@
-from rest_framework.permissions import IsAuthenticated
+from django.db import connection, transaction
+from django.db.models import OuterRef
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Cart, CartItem
 from .serializers import CartSerializer, CartItemSerializer, CartItemSimpleSerializer
-from products.models import Product
-from orders.models import Order, OrderItem
+from products.models import Product, ProductImage
+from .checkout import place_order, CheckoutError
+from .reservations import with_available_stock, hold, release
+from .batch import apply_cart_operations, CartBatchError
+from .guest import read_guest_cart, write_guest_cart
+from users.authentication import TrustedClaimsJWTAuthentication
 
 
 def format_cart_item_response(cart_item):
@@ -13,7 +19,11 @@ def format_cart_item_response(cart_item):
     Format cart item response with complete product details
     """
     product = cart_item.product
-    images = [img.image.url for img in product.images.all()]
+    if hasattr(product, "image_names"):
+        storage = ProductImage._meta.get_field("image").storage
+        images = [storage.url(name) for name in product.image_names]
+    else:
+        images = [img.image.url for img in product.images.all()]
     
     return {
         "product_id": product.id,
@@ -28,15 +38,38 @@ def format_cart_item_response(cart_item):
     }
 
 
+def with_images(queryset):
+    """
+    Load product images along with the products: an `image_names` array column
+    on PostgreSQL, one prefetch query elsewhere
+    """
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.expressions import ArraySubquery
+
+        return queryset.annotate(
+            image_names=ArraySubquery(
+                ProductImage.objects.filter(product=OuterRef("pk")).order_by("pk").values("image")
+            )
+        )
+    return queryset.prefetch_related("images")
+
+
 class CartAPIView(APIView):
     """
     GET: Get current user's cart with complete product details
     """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [TrustedClaimsJWTAuthentication]
 
     def get(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        items = cart.items.select_related("product").prefetch_related("product__images").all()
+        # Read only: trusted claims never hit the user table, so a token can
+        # outlive its user and must not create rows for it
+        items = (
+            CartItem.objects
+            .filter(cart__user_id=request.user.id)
+            .select_related("product")
+            .prefetch_related("product__images")
+        )
         
         # Return cart items with complete product details
         data = [format_cart_item_response(item) for item in items]
@@ -51,6 +84,160 @@ class CartAPIView(APIView):
         )
 
 
+class GuestCartAPIView(APIView):
+    """
+    Cart for anonymous visitors, kept in a signed cookie (no Cart row).
+    Merged into the user's cart on login.
+    GET: Cart in the same shape as CartAPIView
+    POST: Add product {"product_id": 1, "quantity": 2}
+    PATCH: Set quantity {"product_id": 1, "quantity": 3} (0 removes)
+    DELETE: Remove product {"product_id": 1}
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def cart_response(self, request, items, status_code=status.HTTP_200_OK):
+        # One batched product lookup (+ images) for the whole cart
+        products = (
+            Product.objects
+            .filter(is_active=True)
+            .prefetch_related("images")
+            .in_bulk(items.keys())
+        )
+        items = {
+            product_id: quantity
+            for product_id, quantity in items.items()
+            if product_id in products
+        }
+        data = [
+            format_cart_item_response(CartItem(product=products[product_id], quantity=quantity))
+            for product_id, quantity in items.items()
+        ]
+
+        response = Response(
+            {
+                "items": data,
+                "total_items": sum(item["quantity"] for item in data),
+                "total_price": sum(item["subtotal"] for item in data),
+            },
+            status=status_code
+        )
+        write_guest_cart(response, request, items)
+        return response
+
+    def parse(self, request, minimum):
+        try:
+            product_id = int(request.data.get("product_id"))
+            quantity = int(request.data.get("quantity", 1))
+        except (TypeError, ValueError):
+            return None, Response(
+                {"error": "product_id is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if quantity < minimum or quantity > 5:
+            return None, Response(
+                {"error": f"Quantity must be between {minimum} and 5"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return (product_id, quantity), None
+
+    def check_stock(self, product_id, quantity):
+        product = with_available_stock(
+            Product.objects.filter(id=product_id, is_active=True)
+        ).first()
+        if product is None:
+            return Response(
+                {"error": "Product not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if product.available_stock < quantity:
+            return Response(
+                {
+                    "error": f"Insufficient stock. Available: {product.available_stock}",
+                    "available_quantity": product.available_stock,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+
+    def get(self, request):
+        return self.cart_response(request, read_guest_cart(request))
+
+    def post(self, request):
+        parsed, error = self.parse(request, minimum=1)
+        if error:
+            return error
+        product_id, quantity = parsed
+
+        items = read_guest_cart(request)
+        new_quantity = items.get(product_id, 0) + quantity
+        error = self.check_stock(product_id, new_quantity)
+        if error:
+            return error
+
+        items[product_id] = min(new_quantity, 5)
+        return self.cart_response(request, items, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        parsed, error = self.parse(request, minimum=0)
+        if error:
+            return error
+        product_id, quantity = parsed
+
+        items = read_guest_cart(request)
+        if product_id not in items:
+            return Response(
+                {"error": "Cart item not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if quantity == 0:
+            items.pop(product_id)
+        else:
+            error = self.check_stock(product_id, quantity)
+            if error:
+                return error
+            items[product_id] = quantity
+
+        return self.cart_response(request, items)
+
+    def delete(self, request):
+        items = read_guest_cart(request)
+        try:
+            items.pop(int(request.data.get("product_id")))
+        except (TypeError, ValueError, KeyError):
+            return Response(
+                {"error": "Cart item not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return self.cart_response(request, items)
+
+
+class CartSummaryAPIView(APIView):
+    """
+    GET: Cart badge totals from the denormalized Cart row (single query)
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [TrustedClaimsJWTAuthentication]
+
+    def get(self, request):
+        summary = (
+            Cart.objects
+            .filter(user_id=request.user.id)
+            .values("item_count", "subtotal")
+            .first()
+        ) or {"item_count": 0, "subtotal": 0}
+
+        return Response(
+            {
+                "total_items": summary["item_count"],
+                "total_price": float(summary["subtotal"]),
+            },
+            status=status.HTTP_200_OK
+        )
+
+
 class AddToCartAPIView(APIView):
     """
     POST: Add product to cart
@@ -74,67 +261,58 @@ class AddToCartAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            product = Product.objects.get(id=product_id, is_active=True)
-        except Product.DoesNotExist:
-            return Response(
-                {"error": "Product not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Three queries per click: lock the cart, read the product (stock, holds
+        # and images), then upsert the line, hold and totals in one statement
+        with transaction.atomic():
+            cart, created = Cart.objects.select_for_update().get_or_create(user_id=request.user.id)
+
+            try:
+                # Stock minus units reserved by other carts, in the same query
+                product = with_available_stock(
+                    with_images(Product.objects.filter(id=product_id, is_active=True)),
+                    cart
+                ).get()
+            except Product.DoesNotExist:
+                return Response(
+                    {"error": "Product not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-        # Check stock availability
-        if product.stock < quantity:
-            return Response(
-                {
-                    "error": f"Insufficient stock. Available: {product.stock}",
-                    "available_quantity": product.stock,
-                },
-                status=status.HTTP_400_BAD_REQUEST
+            # Check stock availability
+            if product.available_stock < quantity:
+                return Response(
+                    {
+                        "error": f"Insufficient stock. Available: {product.available_stock}",
+                        "available_quantity": product.available_stock,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Insert or add to the existing line, capped at 5 and stock availability
+            result = CartItem.objects.add_quantity(
+                cart,
+                product.id,
+                quantity,
+                available=product.available_stock,
+                limit=min(5, product.available_stock),
+                price=product.price,
             )
 
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        
-        # Handle potential duplicates: get first matching item or create new one
-        # If duplicates exist, merge them by summing quantities and keeping the first
-        try:
-            cart_item = CartItem.objects.get(cart=cart, product=product)
-            created = False
-        except CartItem.DoesNotExist:
-            cart_item = CartItem.objects.create(cart=cart, product=product, quantity=0)
-            created = True
-        except CartItem.MultipleObjectsReturned:
-            # Handle duplicates: merge all duplicate items into the first one
-            duplicate_items = CartItem.objects.filter(cart=cart, product=product)
-            cart_item = duplicate_items.first()
-            total_quantity = sum(item.quantity for item in duplicate_items)
-            cart_item.quantity = total_quantity
-            # Delete the other duplicates
-            duplicate_items.exclude(id=cart_item.id).delete()
-            created = False
-
-        if not created:
-            # Product already in cart - add to quantity
-            new_quantity = cart_item.quantity + quantity
-            
-            # Check stock for new quantity
-            if product.stock < new_quantity:
+            if result is None:
+                # Product already in cart and the new total would exceed stock
                 return Response(
                     {
-                        "error": f"Insufficient stock. Available: {product.stock}",
-                        "available_quantity": product.stock,
-                        "current_quantity": cart_item.quantity,
+                        "error": f"Insufficient stock. Available: {product.available_stock}",
+                        "available_quantity": product.available_stock,
+                        "current_quantity": CartItem.objects.filter(
+                            cart=cart, product=product
+                        ).values_list("quantity", flat=True).first(),
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            cart_item.quantity = new_quantity
-        else:
-            # New item
-            cart_item.quantity = quantity
 
-        # Cap quantity at 5 and stock availability
-        cart_item.quantity = min(cart_item.quantity, 5, product.stock)
-        cart_item.save()
+        item_id, new_quantity, _ = result
+        cart_item = CartItem(id=item_id, cart=cart, product=product, quantity=new_quantity)
 
         return Response(
             format_cart_item_response(cart_item),
@@ -142,6 +320,37 @@ class AddToCartAPIView(APIView):
         )
 
 
+class BatchCartAPIView(APIView):
+    """
+    POST: Apply several cart line changes at once (all or nothing)
+    Request body: {"items": [{"product_id": 1, "quantity": 2, "op": "add"}, ...]}
+    op: add (default) | set | remove
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response(
+                {"error": 'Request body must be an object: {"items": [...]}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cart, created = Cart.objects.get_or_create(user=request.user)
+
+        try:
+            lines = apply_cart_operations(cart, request.data.get("items"))
+        except CartBatchError as e:
+            return Response(
+                {"error": str(e), "errors": e.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {"items": [format_cart_item_response(line) for line in lines]},
+            status=status.HTTP_200_OK
+        )
+
+
 class UpdateCartAPIView(APIView):
     """
     PATCH: Update cart item quantity
@@ -166,38 +375,53 @@ class UpdateCartAPIView(APIView):
             )
 
         try:
-            product = Product.objects.get(id=product_id)
             cart = Cart.objects.get(user=request.user)
-            cart_item = CartItem.objects.get(
-                cart=cart,
-                product_id=product_id
-            )
-        except (Product.DoesNotExist, Cart.DoesNotExist, CartItem.DoesNotExist):
+            product = with_available_stock(Product.objects.filter(id=product_id), cart).get()
+        except (Product.DoesNotExist, Cart.DoesNotExist):
             return Response(
                 {"error": "Cart item or product not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         # Check stock availability for new quantity
-        if quantity > 0 and product.stock < quantity:
+        if quantity > 0 and product.available_stock < quantity:
             return Response(
                 {
-                    "error": f"Insufficient stock. Available: {product.stock}",
-                    "available_quantity": product.stock,
+                    "error": f"Insufficient stock. Available: {product.available_stock}",
+                    "available_quantity": product.available_stock,
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # If quantity is 0, delete the item
-        if quantity == 0:
-            cart_item.delete()
-            return Response(
-                {"success": True, "message": "Item removed from cart"},
-                status=status.HTTP_200_OK
-            )
+        # The cart is locked so concurrent updates apply their totals delta
+        # against the quantity they actually replace
+        with transaction.atomic():
+            cart.lock()
+            try:
+                cart_item = CartItem.objects.get(
+                    cart=cart,
+                    product_id=product_id
+                )
+            except CartItem.DoesNotExist:
+                return Response(
+                    {"error": "Cart item or product not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-        cart_item.quantity = quantity
-        cart_item.save()
+            # If quantity is 0, delete the item
+            if quantity == 0:
+                cart_item.delete()
+                release(cart, [product.id])
+                cart.adjust_totals(-cart_item.quantity, -cart_item.quantity * product.price)
+                return Response(
+                    {"success": True, "message": "Item removed from cart"},
+                    status=status.HTTP_200_OK
+                )
+
+            cart.adjust_totals(quantity - cart_item.quantity, (quantity - cart_item.quantity) * product.price)
+            cart_item.quantity = quantity
+            cart_item.save(update_fields=["quantity"])
+            hold(cart, {product.id: quantity})
 
         return Response(
             format_cart_item_response(cart_item),
@@ -230,18 +454,30 @@ class RemoveFromCartAPIView(APIView):
             )
 
         try:
-            cart_item = CartItem.objects.get(
-                cart=cart,
-                product_id=product_id
-            )
-            cart_item.delete()
+            with transaction.atomic():
+                cart.lock()
+                cart_item = CartItem.objects.select_related("product").get(
+                    cart=cart,
+                    product_id=product_id
+                )
+                cart_item.delete()
+                release(cart, [product_id])
+                cart.adjust_totals(-cart_item.quantity, -cart_item.subtotal)
             return Response(
                 {"success": True, "message": "Item removed from cart"},
                 status=status.HTTP_200_OK
             )
         except CartItem.MultipleObjectsReturned:
             # Handle duplicates: delete all matching items
+            duplicate_items = list(
+                CartItem.objects.select_related("product").filter(cart=cart, product_id=product_id)
+            )
             CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+            release(cart, [product_id])
+            cart.adjust_totals(
+                -sum(item.quantity for item in duplicate_items),
+                -sum(item.subtotal for item in duplicate_items)
+            )
             return Response(
                 {"success": True, "message": "Item removed from cart"},
                 status=status.HTTP_200_OK
@@ -262,8 +498,12 @@ class ClearCartAPIView(APIView):
     def post(self, request):
         try:
             cart = Cart.objects.get(user=request.user)
-            item_count = cart.items.count()
-            cart.items.all().delete()
+            with transaction.atomic():
+                cart.lock()
+                item_count = cart.items.count()
+                cart.items.all().delete()
+                release(cart)
+                cart.reset_totals()
             return Response(
                 {
                     "success": True,
@@ -289,48 +529,9 @@ class CheckoutAPIView(APIView):
 
     def post(self, request):
         try:
-            cart = Cart.objects.get(user=request.user)
-        except Cart.DoesNotExist:
-            return Response(
-                {"error": "Cart is empty"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not cart.items.exists():
-            return Response(
-                {"error": "Cart is empty"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Validate stock for all items before creating order
-        for item in cart.items.all():
-            if item.product.stock < item.quantity:
-                return Response(
-                    {
-                        "error": f"Insufficient stock for {item.product.name}. Available: {item.product.stock}",
-                        "product_id": item.product.id,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=cart.total_price,
-            status="pending"
-        )
-
-        for item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price
-            )
-            # Reduce stock after order
-            item.product.stock -= item.quantity
-            item.product.save()
-
-        cart.items.all().delete()
+            order = place_order(request.user)
+        except CheckoutError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             {
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+def is_exempt(request):
+    prefixes = tuple(getattr(settings, "API_MIDDLEWARE_EXEMPT_PREFIXES", ()))
+    return bool(prefixes) and request.path_info.startswith(prefixes)
+
+
+class ApiExemptMixin:
+    """
+    Skip the wrapped middleware entirely for API_MIDDLEWARE_EXEMPT_PREFIXES.
+
+    API views authenticate with JWT cookies (users.authentication) and never touch
+    request.session or messages, so only /admin/ and other HTML views pay for them.
+    The classes below subclass the stock middleware so Django's admin checks
+    still find them in MIDDLEWARE.
+    """
+
+    def __call__(self, request):
+        if is_exempt(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class ApiExemptSessionMiddleware(ApiExemptMixin, SessionMiddleware):
+    pass
+
+
+class ApiExemptAuthenticationMiddleware(ApiExemptMixin, AuthenticationMiddleware):
+    pass
+
+
+class ApiExemptMessageMiddleware(ApiExemptMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,126 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk, reverse=False):
+    """
+    Build an opaque cursor from the sort value and id of a boundary row
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+
+    payload = json.dumps({"v": value, "id": pk, "r": reverse}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload["v"], int(payload["id"]), bool(payload.get("r", False))
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a single sort field with `id` as tiebreaker.
+
+    Each page is fetched with `WHERE (field, id) > (last_value, last_id)` instead of
+    OFFSET, so page 500 costs the same as page 1 and no COUNT(*) is needed.
+    """
+
+    def __init__(self, queryset, ordering, page_size, max_page_size=100):
+        self.queryset = queryset
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+        self.page_size = self._page_size(page_size, max_page_size)
+
+    @staticmethod
+    def _page_size(page_size, max_page_size):
+        """
+        page_size (possibly a raw query param) as a positive int, capped at max_page_size
+        """
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError):
+            raise InvalidCursor("page_size must be a positive integer")
+        if page_size < 1:
+            raise InvalidCursor("page_size must be a positive integer")
+        return min(page_size, max_page_size)
+
+    def _sort_value(self, value):
+        """
+        Convert a decoded cursor value to the sort field's type; anything that
+        doesn't fit (null, lists, malformed dates, ...) is an invalid cursor
+        """
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise InvalidCursor("Invalid cursor")
+
+        annotation = self.queryset.query.annotations.get(self.field)
+        try:
+            if annotation is not None:
+                field = annotation.output_field
+            else:
+                field = self.queryset.model._meta.get_field(self.field)
+            return field.to_python(value)
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+
+    def _order(self, descending):
+        prefix = "-" if descending else ""
+        return [f"{prefix}{self.field}", f"{prefix}id"]
+
+    def _after(self, value, pk, descending):
+        op = "lt" if descending else "gt"
+        return (
+            Q(**{f"{self.field}__{op}": value}) |
+            Q(**{self.field: value, f"id__{op}": pk})
+        )
+
+    def paginate(self, cursor=None):
+        """
+        Returns (rows, next_cursor, previous_cursor)
+        """
+        reverse = False
+        qs = self.queryset
+
+        if cursor:
+            value, pk, reverse = decode_cursor(cursor)
+            value = self._sort_value(value)
+            # Walking backwards flips the sort direction, then the page is re-reversed
+            descending = self.descending != reverse
+            qs = qs.filter(self._after(value, pk, descending))
+
+        descending = self.descending != reverse
+        rows = list(qs.order_by(*self._order(descending))[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+
+        first, last = rows[0], rows[-1]
+        next_cursor = None
+        previous_cursor = None
+
+        if has_more or reverse:
+            next_cursor = encode_cursor(getattr(last, self.field), last.pk)
+        if cursor and (has_more or not reverse):
+            previous_cursor = encode_cursor(getattr(first, self.field), first.pk, reverse=True)
+
+        return rows, next_cursor, previous_cursor
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+import importlib.util
 import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,20 +56,25 @@ INSTALLED_APPS = [
     'reviews',
     'wishlist',
     'notifications',
-    'cart'
+    'cart',
+    'reports',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'ecommerce_backend.middleware.ApiExemptSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'ecommerce_backend.middleware.ApiExemptAuthenticationMiddleware',
+    'ecommerce_backend.middleware.ApiExemptMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Session / auth / messages middleware are skipped under these prefixes
+# (ecommerce_backend.middleware); /admin/ keeps the full stack
+API_MIDDLEWARE_EXEMPT_PREFIXES = ("/api/",)
+
 CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOWED_ORIGINS = [
@@ -147,6 +153,40 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Per-process LRU of JWT-authenticated users (users.user_cache)
+AUTH_USER_CACHE = {
+    "TIMEOUT": 30,
+    "MAX_SIZE": 1024,
+    "SHARED_CACHE": None,
+}
+
+# Revoked refresh tokens: DB table behind a per-process bloom filter (users.denylist)
+TOKEN_DENYLIST = {
+    "CAPACITY": 100_000,
+    "ERROR_RATE": 0.001,
+    "REFRESH_INTERVAL": 5,
+    "REBUILD_INTERVAL": 3600,
+}
+
+# How long cart lines hold stock for their cart (cart.reservations)
+CART_RESERVATION_TTL = timedelta(minutes=15)
+
+# Password hashing (users.hashers). The first entry hashes new passwords; the
+# rest still verify older hashes, which are upgraded transparently on login.
+# Argon2 needs the argon2-cffi package, otherwise scrypt is preferred.
+PASSWORD_HASHERS = [
+    'users.hashers.TunedScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+if importlib.util.find_spec("argon2") is not None:
+    PASSWORD_HASHERS.insert(0, 'users.hashers.TunedArgon2PasswordHasher')
+
+PASSWORD_HASHER_PARAMS = {
+    "argon2": {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},
+    "scrypt": {"work_factor": 2**15, "block_size": 8, "parallelism": 1},
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
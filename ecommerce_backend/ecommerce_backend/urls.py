@@ -23,4 +23,5 @@ urlpatterns = [
     path("api/products/", include("products.urls")),
     path("api/cart/", include("cart.urls")),
     path("api/orders/", include("orders.urls")),
+    path("api/reports/", include("reports.urls")),
 ]
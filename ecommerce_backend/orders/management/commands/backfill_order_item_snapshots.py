@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from orders.models import OrderItem
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Copy product name/slug/image/category onto order items created before snapshots existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = (
+            OrderItem.objects
+            .filter(product_name="", product__isnull=False)
+            .select_related("product")
+            .prefetch_related(
+                Prefetch("product__images", queryset=ProductImage.objects.order_by("id"))
+            )
+            .order_by("id")
+        )
+
+        last_id = 0
+        total = 0
+        while True:
+            # Keyset batches: each round only scans rows after the last one written
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            for item in batch:
+                item.snapshot_product(item.product)
+            OrderItem.objects.bulk_update(batch, ["product_name", "product_slug", "product_image", "category"])
+
+            last_id = batch[-1].id
+            total += len(batch)
+            self.stdout.write(f"Backfilled {total} order items")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {total} order items backfilled"))
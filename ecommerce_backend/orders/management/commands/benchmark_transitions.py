@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders.models import Order
+from orders.state_machine import bulk_transition
+
+
+LIFECYCLE = ("paid", "shipped", "delivered")
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of bulk_transition through pending -> paid -> shipped -> delivered, "
+        "batched vs one order per transaction, on seeded orders that are rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10000, help="Orders moved in batches")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--baseline-orders", type=int, default=500, help="Orders moved one per transaction"
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for name, count, batch_size in (
+                ("batched", options["orders"], options["batch_size"]),
+                ("per-order", options["baseline_orders"], 1),
+            ):
+                orders = Order.objects.bulk_create(
+                    [Order(total_amount=100, status="pending") for _ in range(count)],
+                    batch_size=1000,
+                )
+                order_ids = [order.id for order in orders]
+
+                for to_status in LIFECYCLE:
+                    started = time.perf_counter()
+                    moved, skipped = bulk_transition(order_ids, to_status, batch_size=batch_size)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{name:>9}: {len(moved)} -> {to_status:<9} {elapsed:.2f}s, "
+                        f"{len(moved) / elapsed:.0f} orders/sec"
+                    )
+
+            # Seeded orders, their history and rollup changes are all discarded
+            transaction.set_rollback(True)
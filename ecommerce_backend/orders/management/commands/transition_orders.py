@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import Order
+from orders.state_machine import InvalidTransition, bulk_transition
+
+
+class Command(BaseCommand):
+    help = "Move orders to a new status in bulk (e.g. every paid order to shipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", required=True, dest="to_status", help="Target status")
+        parser.add_argument("--ids", nargs="+", type=int, help="Order ids to move")
+        parser.add_argument("--from-status", help="Move every order currently in this status")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["ids"] and not options["from_status"]:
+            raise CommandError("Pass --ids or --from-status")
+
+        if options["ids"]:
+            order_ids = options["ids"]
+        else:
+            order_ids = list(
+                Order.objects
+                .filter(status=options["from_status"])
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+        started = time.perf_counter()
+        try:
+            moved, skipped = bulk_transition(
+                order_ids,
+                options["to_status"],
+                batch_size=options["batch_size"],
+            )
+        except InvalidTransition as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        rate = len(moved) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {len(moved)} orders to {options['to_status']} "
+            f"({len(skipped)} skipped) in {elapsed:.2f}s, {rate:.0f} orders/sec"
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_current_category(apps, schema_editor):
+    # Best effort for existing rows: the category their product has now
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    OrderItem.objects.filter(product__isnull=False).update(
+        category_id=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("category_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_orderitem_product_snapshot'),
+        ('products', '0007_relatedproduct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.category'),
+        ),
+        migrations.RunPython(copy_current_category, migrations.RunPython.noop),
+    ]
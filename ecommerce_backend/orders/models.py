@@ -1,6 +1,6 @@
 from django.db import models
 from users.models import User
-from products.models import Product
+from products.models import Category, Product
 
 class Order(models.Model):
     STATUS_CHOICES = (
@@ -16,6 +16,12 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Order history: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id}"
 
@@ -25,3 +31,39 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Product data as it was at purchase time, so order pages never join Product
+    product_name = models.CharField(max_length=200, blank=True, default="")
+    product_slug = models.SlugField(blank=True, default="")
+    product_image = models.CharField(max_length=500, blank=True, default="")
+    # Category at purchase time: the rollups counted the sale under it, so a
+    # cancellation must take it back from there even if the product moved since
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    def snapshot_product(self, product):
+        """
+        Copy name, slug, category and primary image URL (images should be prefetched)
+        """
+        images = list(product.images.all())
+        self.product_name = product.name
+        self.product_slug = product.slug
+        self.product_image = images[0].image.url if images else ""
+        self.category_id = product.category_id
+
+
+class OrderStatusHistory(models.Model):
+    """
+    Append-only log of order status changes, written by orders.state_machine
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="status_history")
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order", "changed_at"], name="order_history_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status}"
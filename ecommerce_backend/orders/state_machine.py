@@ -0,0 +1,87 @@
+from django.db import transaction
+
+from reports.rollups import record_cancellations, record_status_changes
+from .models import Order, OrderStatusHistory
+
+
+CANCELLED = "cancelled"
+
+# Allowed moves: current status -> statuses it may move to
+TRANSITIONS = {
+    "pending": {"paid", "cancelled"},
+    "paid": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def allowed_sources(to_status):
+    if to_status not in TRANSITIONS:
+        raise InvalidTransition(f"Unknown status: {to_status}")
+
+    sources = [status for status, targets in TRANSITIONS.items() if to_status in targets]
+    if not sources:
+        raise InvalidTransition(f"No order can move to {to_status}")
+    return sources
+
+
+def bulk_transition(order_ids, to_status, changed_by=None, batch_size=1000):
+    """
+    Move orders to `to_status` in batches. Per batch: lock the orders that are in
+    an allowed source status, move them with one conditional
+    UPDATE ... WHERE status IN (...), bulk_create their history rows and move
+    them between the daily status rollups (cancelled orders are also taken off
+    the product and category rollups).
+
+    Returns (moved order ids, skipped order ids). Orders that don't exist or
+    whose current status doesn't allow the move are skipped.
+    """
+    sources = allowed_sources(to_status)
+    order_ids = list(dict.fromkeys(order_ids))
+    moved = []
+
+    for start in range(0, len(order_ids), batch_size):
+        chunk = order_ids[start:start + batch_size]
+
+        with transaction.atomic():
+            eligible = list(
+                Order.objects
+                .select_for_update()
+                .filter(id__in=chunk, status__in=sources)
+                .values_list("id", "status", "created_at", "total_amount")
+            )
+            if not eligible:
+                continue
+
+            Order.objects.filter(
+                id__in=[order_id for order_id, *_ in eligible],
+                status__in=sources,
+            ).update(status=to_status)
+
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(
+                    order_id=order_id,
+                    from_status=from_status,
+                    to_status=to_status,
+                    changed_by=changed_by,
+                )
+                for order_id, from_status, *_ in eligible
+            ])
+
+            record_status_changes(
+                [(created_at, from_status, total) for _, from_status, created_at, total in eligible],
+                to_status,
+            )
+            if to_status == CANCELLED:
+                record_cancellations([order_id for order_id, *_ in eligible])
+
+        moved.extend(order_id for order_id, *_ in eligible)
+
+    moved_set = set(moved)
+    skipped = [order_id for order_id in order_ids if order_id not in moved_set]
+    return moved, skipped
@@ -1,3 +1,92 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from users.models import User
+
+from .models import Order, OrderStatusHistory
+from .state_machine import InvalidTransition, bulk_transition
+
+
+def create_orders(*statuses):
+    return [Order.objects.create(total_amount=100, status=status).id for status in statuses]
+
+
+class BulkTransitionTests(TestCase):
+    def test_moves_allowed_orders_and_skips_the_rest(self):
+        pending, paid, shipped = create_orders("pending", "paid", "shipped")
+        missing = shipped + 100
+
+        moved, skipped = bulk_transition([pending, paid, shipped, missing, pending], "paid", batch_size=2)
+
+        self.assertEqual(moved, [pending])
+        self.assertEqual(skipped, [paid, shipped, missing])
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {pending: "paid", paid: "paid", shipped: "shipped"},
+        )
+
+    def test_each_move_appends_a_history_row(self):
+        staff = User.objects.create_user(email="ops@example.com", username="ops", password="pass12345")
+        order_id, = create_orders("pending")
+
+        for to_status in ("paid", "shipped", "delivered"):
+            bulk_transition([order_id], to_status, changed_by=staff)
+
+        self.assertEqual(
+            list(
+                OrderStatusHistory.objects
+                .filter(order_id=order_id, changed_by=staff)
+                .order_by("id")
+                .values_list("from_status", "to_status")
+            ),
+            [("pending", "paid"), ("paid", "shipped"), ("shipped", "delivered")],
+        )
+
+    def test_refused_targets(self):
+        create_orders("pending")
+        for to_status in ("pending", "refunded"):
+            with self.subTest(to_status=to_status):
+                with self.assertRaises(InvalidTransition):
+                    bulk_transition(list(Order.objects.values_list("id", flat=True)), to_status)
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_delivered_and_cancelled_orders_are_final(self):
+        delivered, cancelled = create_orders("delivered", "cancelled")
+
+        moved, skipped = bulk_transition([delivered, cancelled], "cancelled")
+        self.assertEqual((moved, skipped), ([], [delivered, cancelled]))
+        moved, skipped = bulk_transition([cancelled], "paid")
+        self.assertEqual((moved, skipped), ([], [cancelled]))
+
+
+class BulkTransitionAPITests(TestCase):
+    def test_staff_only(self):
+        order_id, = create_orders("pending")
+        User.objects.create_user(email="buyer@example.com", username="buyer", password="pass12345")
+        User.objects.create_user(email="ops@example.com", username="ops", password="pass12345", is_staff=True)
+
+        for email, expected in (("buyer@example.com", 403), ("ops@example.com", 200)):
+            with self.subTest(email=email):
+                self.client.post(
+                    "/api/users/login/", {"email": email, "password": "pass12345"}, content_type="application/json"
+                )
+                response = self.client.post(
+                    "/api/orders/bulk-transition/",
+                    {"order_ids": [order_id], "status": "paid"},
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, expected)
+
+        self.assertEqual(response.json(), {"status": "paid", "updated": 1, "skipped": []})
+
+
+class BenchmarkTransitionsTests(TestCase):
+    def test_seeded_orders_are_rolled_back(self):
+        out = StringIO()
+        call_command("benchmark_transitions", orders=20, batch_size=8, baseline_orders=3, stdout=out)
+
+        self.assertIn("20 -> delivered", out.getvalue())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderStatusHistory.objects.exists())
@@ -2,12 +2,16 @@ from django.urls import path
 from .views import (
     UserOrdersAPIView,
     OrderDetailAPIView,
+    OrderBulkTransitionAPIView,
 )
 
 urlpatterns = [
     # List all user orders
     path("order-list", UserOrdersAPIView.as_view(), name="user-orders"),
 
+    # Bulk status change for operations (staff only)
+    path("bulk-transition/", OrderBulkTransitionAPIView.as_view(), name="order-bulk-transition"),
+
     # Order detail / tracking
     path("<int:order_id>/", OrderDetailAPIView.as_view(), name="order-detail"),
 ]
\ No newline at end of file
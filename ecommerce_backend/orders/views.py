@@ -1,7 +1,7 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -9,24 +9,67 @@ from cart.models import Cart, CartItem
 from cart.serializers import CartSerializer
 from products.models import Product
 
+from ecommerce_backend.pagination import KeysetPaginator, InvalidCursor
+
 from orders.models import Order, OrderItem
+from orders.state_machine import bulk_transition, InvalidTransition
+from users.authentication import TrustedClaimsJWTAuthentication
+
+def format_order_item(item):
+    # Reads the purchase-time snapshot only, no Product join
+    return {
+        "product": item.product_name or None,
+        "product_id": item.product_id,
+        "product_slug": item.product_slug,
+        "product_image": item.product_image or None,
+        "quantity": item.quantity,
+        "price": item.price,
+    }
+
 
 class UserOrdersAPIView(APIView):
+    """
+    GET: Current user's orders, newest first, cursor paginated on (created_at, id)
+    Query params: page_size (max 100), cursor, include_items=1
+    """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [TrustedClaimsJWTAuthentication]
+    max_page_size = 100
 
     def get(self, request):
-        orders = Order.objects.filter(user=request.user).order_by("-created_at")
+        orders = Order.objects.filter(user_id=request.user.id)
+
+        include_items = request.GET.get("include_items", "").strip() == "1"
+        if include_items:
+            orders = orders.prefetch_related("items")
+
+        try:
+            paginator = KeysetPaginator(
+                orders, "-created_at", request.GET.get("page_size", 20), self.max_page_size
+            )
+            rows, next_cursor, previous_cursor = paginator.paginate(
+                request.GET.get("cursor", "").strip() or None
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         data = []
-        for order in orders:
-            data.append({
+        for order in rows:
+            row = {
                 "order_id": order.id,
                 "status": order.status,
                 "total_amount": order.total_amount,
                 "created_at": order.created_at,
-            })
+            }
+            if include_items:
+                row["items"] = [format_order_item(item) for item in order.items.all()]
+            data.append(row)
 
-        return Response(data)
+        return Response({
+            "next": next_cursor,
+            "previous": previous_cursor,
+            "results": data,
+        })
     
 class OrderDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -43,12 +86,38 @@ class OrderDetailAPIView(APIView):
             "order_id": order.id,
             "status": order.status,
             "total_amount": order.total_amount,
-            "items": [
-                {
-                    "product": item.product.name if item.product else None,
-                    "quantity": item.quantity,
-                    "price": item.price,
-                }
-                for item in items
-            ]
-        })
\ No newline at end of file
+            "items": [format_order_item(item) for item in items]
+        })
+
+
+class OrderBulkTransitionAPIView(APIView):
+    """
+    POST: Move many orders to a new status (staff only)
+    Request body: {"order_ids": [1, 2, 3], "status": "shipped"}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        order_ids = request.data.get("order_ids")
+        to_status = request.data.get("status")
+
+        if not isinstance(order_ids, list) or not to_status:
+            return Response(
+                {"error": "order_ids (list) and status are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            moved, skipped = bulk_transition(
+                [int(order_id) for order_id in order_ids],
+                to_status,
+                changed_by=request.user,
+            )
+        except (InvalidTransition, TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "status": to_status,
+            "updated": len(moved),
+            "skipped": skipped,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+from .models import Category
+
+
+CATEGORY_TREE_CACHE_KEY = "products:category_tree"
+# Save/delete signals only clear the cache of the worker that made the change
+# (the default cache is per process), so other workers pick it up within this TTL
+CATEGORY_TREE_TTL = 60
+
+
+def build_category_tree():
+    """
+    Nested category tree from a single query over the adjacency list
+    """
+    image_storage = Category._meta.get_field("image").storage
+    rows = Category.objects.order_by("name").values("id", "name", "slug", "image", "parent_id")
+
+    nodes = {}
+    for row in rows:
+        nodes[row["id"]] = {
+            "id": row["id"],
+            "name": row["name"],
+            "slug": row["slug"],
+            "image": image_storage.url(row["image"]) if row["image"] else None,
+            "parent_id": row["parent_id"],
+            "children": [],
+        }
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.pop("parent_id"))
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            roots.append(node)
+
+    return roots
+
+
+def get_category_tree():
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, CATEGORY_TREE_TTL)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
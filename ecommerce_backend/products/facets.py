@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+
+from .models import Category
+
+
+# Price range buckets used by the filter endpoint: id -> (min, max), inclusive
+PRICE_RANGES = {
+    1: (None, 500),
+    2: (500, 999),
+    3: (1000, 4999),
+    4: (5000, None),
+}
+
+
+def price_range_q(range_id):
+    low, high = PRICE_RANGES[range_id]
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lte=high)
+    return q
+
+
+def category_ids(row, include_descendants):
+    """
+    The row's category, plus its ancestors when counts roll up the tree
+    """
+    path = row["category__path"]
+    if not include_descendants or not path:
+        return [row["category_id"]]
+    return [int(category_id) for category_id in path.split("/") if category_id]
+
+
+def facet_counts(queryset, category_paths=None, include_descendants=True, genders=(), range_ids=()):
+    """
+    Category / target_gender / price range counts for the storefront sidebar.
+
+    One grouped query returns a row per (category, gender, price range membership)
+    combination. Each facet is then folded in Python from the rows that match the
+    *other* selected facets, so a selected value doesn't zero out its siblings.
+
+    With include_descendants (the category filter's default) each category's count
+    is rolled up its materialized path, so it includes its subcategories' products
+    and matches what filtering by it returns; otherwise counts are per exact category.
+    Ancestors with no products of their own cost one extra query for their names.
+    """
+    range_flags = {
+        f"in_range_{rid}": Case(
+            When(price_range_q(rid), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+        for rid in PRICE_RANGES
+    }
+
+    rows = list(
+        queryset
+        .order_by()
+        .values("category_id", "category__name", "category__path", "target_gender", **range_flags)
+        .annotate(count=Count("id"))
+    )
+
+    def category_ok(row):
+        if category_paths is None:
+            return True
+        path = row["category__path"]
+        if include_descendants:
+            return any(path.startswith(p) for p in category_paths)
+        return path in category_paths
+
+    def gender_ok(row):
+        return not genders or row["target_gender"] in genders
+
+    def price_ok(row):
+        return not range_ids or any(row[f"in_range_{rid}"] for rid in range_ids)
+
+    categories = defaultdict(int)
+    category_names = {}
+    target_genders = defaultdict(int)
+    price_ranges = defaultdict(int)
+
+    for row in rows:
+        category_names[row["category_id"]] = row["category__name"]
+        if gender_ok(row) and price_ok(row):
+            for category_id in category_ids(row, include_descendants):
+                categories[category_id] += row["count"]
+
+        if category_ok(row) and price_ok(row):
+            target_genders[row["target_gender"]] += row["count"]
+
+        if category_ok(row) and gender_ok(row):
+            for rid in PRICE_RANGES:
+                if row[f"in_range_{rid}"]:
+                    price_ranges[rid] += row["count"]
+
+    missing = set(categories) - set(category_names)
+    if missing:
+        category_names.update(Category.objects.filter(pk__in=missing).values_list("id", "name"))
+
+    return {
+        "category": sorted(
+            (
+                {"id": cid, "name": category_names[cid], "count": count}
+                for cid, count in categories.items()
+            ),
+            key=lambda c: c["name"].lower(),
+        ),
+        "target_gender": [
+            {"value": value, "count": count}
+            for value, count in sorted(target_genders.items())
+        ],
+        "price_ranges": [
+            {"id": rid, "count": price_ranges.get(rid, 0)}
+            for rid in PRICE_RANGES
+        ],
+    }
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.facets import PRICE_RANGES, facet_counts, price_range_q
+from products.models import Category, Product
+
+
+def fan_out_counts(queryset):
+    """
+    The naive sidebar: one COUNT per category, gender and price range
+    """
+    return {
+        "category": {
+            category_id: queryset.filter(category_id=category_id).count()
+            for category_id in Category.objects.values_list("id", flat=True)
+        },
+        "target_gender": {
+            value: queryset.filter(target_gender=value).count()
+            for value, _ in Product.GENDER_CHOICES
+        },
+        "price_ranges": {
+            range_id: queryset.filter(price_range_q(range_id)).count()
+            for range_id in PRICE_RANGES
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare the single grouped facet query against one COUNT per facet value"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.filter(is_active=True)
+
+        for name, compute in (
+            ("grouped", lambda: facet_counts(queryset)),
+            ("fan-out", lambda: fan_out_counts(queryset)),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                compute()
+
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                compute()
+            elapsed = (time.perf_counter() - started) / options["repeat"] * 1000
+
+            self.stdout.write(f"{name:>7}: {elapsed:.2f}ms, {len(queries)} queries")
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+
+from ecommerce_backend.pagination import KeysetPaginator
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Compare fetch time of page 1 vs a deep page for keyset and OFFSET pagination"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, default=500, help="Deep page to compare against page 1")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        qs = Product.objects.for_listing().filter(is_active=True)
+
+        pages = -(-qs.count() // page_size)
+        deep = min(options["page"], pages)
+        if deep < 2:
+            raise CommandError("Not enough active products for more than one page")
+
+        # Walk the cursors once to get the one that opens the deep page
+        paginator = KeysetPaginator(qs, "-created_at", page_size)
+        cursor = None
+        for _ in range(deep - 1):
+            _, cursor, _ = paginator.paginate(cursor)
+
+        offset = Paginator(qs.order_by("-created_at", "id"), page_size)
+        timings = {
+            "keyset": (
+                self.measure(lambda: paginator.paginate(None), options["repeat"]),
+                self.measure(lambda: paginator.paginate(cursor), options["repeat"]),
+            ),
+            "offset": (
+                self.measure(lambda: list(offset.page(1).object_list), options["repeat"]),
+                self.measure(lambda: list(offset.page(deep).object_list), options["repeat"]),
+            ),
+        }
+
+        for name, (first, last) in timings.items():
+            self.stdout.write(
+                f"{name:>6}: page 1 {first:.2f}ms, page {deep} {last:.2f}ms ({last / first:.1f}x)"
+            )
+
+    def measure(self, fetch, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fetch()
+        return (time.perf_counter() - started) / repeat * 1000
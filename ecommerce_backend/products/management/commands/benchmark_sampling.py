@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.sampling import random_products
+
+
+class Command(BaseCommand):
+    help = "Compare random_products() against ORDER BY RANDOM() on the product table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=12)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.filter(is_active=True)
+        limit = options["limit"]
+        total = Product.objects.count()
+
+        for name, sample in (
+            ("probe", lambda: random_products(queryset, limit)),
+            ("order_by('?')", lambda: list(queryset.order_by("?")[:limit])),
+        ):
+            sample()
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                sample()
+            elapsed = (time.perf_counter() - started) / options["repeat"] * 1000
+            self.stdout.write(f"{name:>13}: {elapsed:.2f}ms for {limit} of {total} products")
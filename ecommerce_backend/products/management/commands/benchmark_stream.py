@@ -0,0 +1,47 @@
+import json
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, RequestFactory, override_settings
+
+from products.models import Product
+from products.serializers import ProductListSerializer
+
+
+class Command(BaseCommand):
+    help = "Peak Python memory of the NDJSON catalog stream vs serializing the whole catalog at once"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/products/products/?stream=ndjson")
+
+    def handle(self, *args, **options):
+        total = Product.objects.filter(is_active=True).count()
+        checkpoints = {max(1, total * share // 4) for share in (1, 2, 3, 4)}
+
+        # Rows are serialized while the stream is consumed, which needs the
+        # test host allowed for build_absolute_uri on image URLs
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            tracemalloc.start()
+            response = Client().get(options["path"])
+
+            # Peak so far after each quarter of the catalog: flat means it doesn't grow
+            lines = 0
+            for chunk in response.streaming_content:
+                lines += chunk.count(b"\n")
+                if lines in checkpoints:
+                    _, peak = tracemalloc.get_traced_memory()
+                    self.stdout.write(f" stream: {lines:>7} rows, peak {peak / 2**20:.2f} MiB")
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            request = RequestFactory().get("/api/products/products/")
+            products = Product.objects.for_listing().filter(is_active=True).order_by("id")
+            body = json.dumps(
+                ProductListSerializer(products, many=True, context={"request": request}).data,
+                cls=DjangoJSONEncoder,
+            )
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.stdout.write(f"  whole: {total:>7} rows, peak {peak / 2**20:.2f} MiB ({len(body)} bytes)")
@@ -0,0 +1,75 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby, permutations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders.models import OrderItem
+from products.models import RelatedProduct
+from wishlist.models import Wishlist
+
+
+class Command(BaseCommand):
+    help = "Rebuild top-K co-purchase neighbours per product from orders and wishlists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=10)
+        parser.add_argument(
+            "--wishlist-weight",
+            type=float,
+            default=0.5,
+            help="Weight of a wishlist co-occurrence relative to an order",
+        )
+        parser.add_argument(
+            "--max-basket-size",
+            type=int,
+            default=50,
+            help="Larger baskets are skipped (pair count grows quadratically)",
+        )
+
+    def handle(self, *args, **options):
+        top_k = options["top_k"]
+        max_basket_size = options["max_basket_size"]
+
+        # Sparse co-occurrence matrix: product id -> Counter(neighbour id -> weight)
+        cooccurrence = defaultdict(Counter)
+
+        order_rows = (
+            OrderItem.objects
+            .filter(product__isnull=False)
+            .exclude(order__status="cancelled")
+            .order_by("order_id")
+            .values_list("order_id", "product_id")
+        )
+        wishlist_rows = (
+            Wishlist.objects
+            .order_by("user_id")
+            .values_list("user_id", "product_id")
+        )
+
+        baskets = 0
+        for rows, weight in ((order_rows, 1.0), (wishlist_rows, options["wishlist_weight"])):
+            for _, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0]):
+                basket = {product_id for _, product_id in group}
+                if len(basket) < 2 or len(basket) > max_basket_size:
+                    continue
+                baskets += 1
+                for a, b in permutations(basket, 2):
+                    cooccurrence[a][b] += weight
+
+        links = []
+        for product_id, neighbours in cooccurrence.items():
+            best = heapq.nlargest(top_k, neighbours.items(), key=lambda item: (item[1], -item[0]))
+            links.extend(
+                RelatedProduct(product_id=product_id, related_id=related_id, score=score, rank=rank)
+                for rank, (related_id, score) in enumerate(best, start=1)
+            )
+
+        with transaction.atomic():
+            RelatedProduct.objects.all().delete()
+            RelatedProduct.objects.bulk_create(links, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(links)} neighbours for {len(cooccurrence)} products from {baskets} baskets"
+        ))
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+TRIGRAM_INDEX = "product_name_trgm_idx"
+SEARCH_VECTOR_INDEX = "product_search_vector_idx"
+
+
+def search_indexes():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return [
+        # Serves name ILIKE '%...%' (products.search.ILike)
+        GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name=TRIGRAM_INDEX),
+        # Same expression as products.search.search_vector()
+        GinIndex(SearchVector("name", "description", config="english"), name=SEARCH_VECTOR_INDEX),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    PostgreSQL only: other backends use products.search.SimpleSearchBackend
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Product = apps.get_model("products", "Product")
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index in search_indexes():
+        schema_editor.add_index(Product, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Product = apps.get_model("products", "Product")
+    for index in search_indexes():
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    """
+    Walk the adjacency list top-down and write every category's materialized path
+    """
+    Category = apps.get_model('products', 'Category')
+
+    children = {}
+    for category in Category.objects.all():
+        children.setdefault(category.parent_id, []).append(category)
+
+    updated = []
+    stack = [(category, "") for category in children.get(None, [])]
+    while stack:
+        category, parent_path = stack.pop()
+        category.path = f"{parent_path}{category.pk}/"
+        updated.append(category)
+        stack.extend((child, category.path) for child in children.get(category.pk, []))
+
+    Category.objects.bulk_update(updated, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,94 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Substr
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL)
     image = models.ImageField(upload_to="category/", null=True, blank=True)
+    # Materialized path of ancestor ids including self, e.g. "1/5/12/".
+    # A subtree is every category whose path starts with the root's path.
+    path = models.CharField(max_length=255, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["path"], name="category_path_idx", opclasses=["varchar_pattern_ops"]),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # In-memory paths (ours and the parent's) may be stale: read and lock the rows
+            locked = Category.objects.select_for_update()
+            old_path = ""
+            if self.pk is not None:
+                old_path = locked.filter(pk=self.pk).values_list("path", flat=True).first() or ""
+            parent_path = ""
+            if self.parent_id is not None:
+                parent_path = locked.filter(pk=self.parent_id).values_list("path", flat=True).first() or ""
+
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("A category cannot be moved under its own subtree")
+
+            self.path = old_path
+            super().save(*args, **kwargs)
+
+            new_path = f"{parent_path}{self.pk}/"
+            if new_path == old_path:
+                return
+
+            Category.objects.filter(pk=self.pk).update(path=new_path)
+            if old_path:
+                # Re-prefix the whole subtree in one statement
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr("path", len(old_path) + 1))
+                )
+            self.path = new_path
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Loads exactly what ProductListSerializer reads: category name via join,
+        images in one prefetch query
+        """
+        return (
+            self
+            .select_related("category")
+            .only(
+                "id",
+                "name",
+                "slug",
+                "price",
+                "stock",
+                "target_gender",
+                "created_at",
+                "is_active",
+                "category__name",
+            )
+            .prefetch_related(
+                models.Prefetch("images", queryset=ProductImage.objects.only("id", "product", "image"))
+            )
+        )
+
+
+    def in_category_paths(self, paths, include_descendants=True):
+        """
+        Products in any of the given categories (by Category.path), optionally
+        including their whole subtrees via an indexed path prefix match
+        """
+        if not paths:
+            return self.none()
+
+        lookup = "category__path__startswith" if include_descendants else "category__path"
+        condition = Q()
+        for path in paths:
+            condition |= Q(**{lookup: path})
+        return self.filter(condition)
+
 
 class Product(models.Model):
     GENDER_CHOICES = (
@@ -30,6 +110,20 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        # Catalog endpoints filter on is_active and sort by created_at / price / name
+        # with id as tiebreaker, so the partial indexes cover the active rows only.
+        indexes = [
+            models.Index(fields=["created_at", "id"], condition=Q(is_active=True), name="product_active_created_idx"),
+            models.Index(fields=["price", "id"], condition=Q(is_active=True), name="product_active_price_idx"),
+            models.Index(fields=["name", "id"], condition=Q(is_active=True), name="product_active_name_idx"),
+            models.Index(fields=["category", "created_at"], condition=Q(is_active=True), name="product_active_cat_idx"),
+            models.Index(fields=["target_gender", "created_at"], condition=Q(is_active=True), name="product_active_gender_idx"),
+            models.Index(fields=["is_active", "created_at"], name="product_status_created_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -37,3 +131,23 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/")
+
+
+class RelatedProduct(models.Model):
+    """
+    Precomputed "frequently bought together" neighbours of a product,
+    rebuilt by the compute_related_products management command
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="related_links")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="recommended_for")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = [['product', 'related']]
+        indexes = [
+            models.Index(fields=["product", "rank"], name="related_product_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score})"
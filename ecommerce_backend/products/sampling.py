@@ -0,0 +1,61 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from .models import Product
+
+
+ID_BOUNDS_CACHE_KEY = "products:id_bounds"
+ID_BOUNDS_TTL = 300
+
+
+def product_id_bounds():
+    """
+    (min id, max id) of the product table; both are primary key index lookups
+    """
+    bounds = cache.get(ID_BOUNDS_CACHE_KEY)
+    if bounds is None:
+        row = Product.objects.aggregate(low=Min("id"), high=Max("id"))
+        bounds = (row["low"], row["high"])
+        cache.set(ID_BOUNDS_CACHE_KEY, bounds, ID_BOUNDS_TTL)
+    return bounds
+
+
+def random_products(queryset, limit, attempts=3, oversample=4):
+    """
+    Random sample of up to `limit` rows from `queryset` without ORDER BY RANDOM().
+
+    Probes random ids in [min id, max id] with a primary key IN lookup; gaps and
+    rows excluded by the queryset are retried a few times, then topped up with a
+    contiguous run from a random starting id. Cost does not grow with table size.
+    """
+    low, high = product_id_bounds()
+    if low is None or limit <= 0:
+        return []
+
+    found = {}
+
+    for _ in range(attempts):
+        needed = limit - len(found)
+        if needed <= 0:
+            break
+
+        candidates = {random.randint(low, high) for _ in range(needed * oversample)}
+        candidates -= found.keys()
+        for product in queryset.filter(id__in=candidates)[:needed]:
+            found[product.pk] = product
+
+    if len(found) < limit:
+        start = random.randint(low, high)
+        for id_filter in ({"id__gte": start}, {"id__lt": start}):
+            needed = limit - len(found)
+            if needed <= 0:
+                break
+            rows = queryset.filter(**id_filter).exclude(id__in=found.keys()).order_by("id")[:needed]
+            for product in rows:
+                found[product.pk] = product
+
+    products = list(found.values())
+    random.shuffle(products)
+    return products
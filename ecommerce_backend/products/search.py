@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, When, Value, IntegerField, Lookup, Q
+from django.utils.module_loading import import_string
+
+
+class ILike(Lookup):
+    """
+    `lhs ILIKE rhs`: the form the pg_trgm GIN index on name can serve.
+    Django's icontains compiles to UPPER(name::text) LIKE UPPER(...), which it can't.
+    """
+    lookup_name = "ilike"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", (*lhs_params, *rhs_params)
+
+
+class BaseSearchBackend:
+    """
+    Filters a product queryset by a search string and annotates `search_rank`
+    (higher is more relevant)
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Full-text search over name + description ranked together with name trigram
+    similarity. Backed by the GIN indexes created in products migration 0005.
+    """
+    config = "english"
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+        vector = search_vector(self.config)
+        search_query = SearchQuery(query, config=self.config, search_type="websearch")
+        name_contains = ILike(F("name"), Value(f"%{connection.ops.prep_for_like_query(query)}%"))
+
+        return (
+            queryset
+            .alias(search_vector=vector)
+            .filter(Q(search_vector=search_query) | name_contains)
+            .annotate(
+                search_rank=SearchRank(vector, search_query) + TrigramSimilarity("name", query)
+            )
+        )
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Database-agnostic fallback (SQLite test runs): substring match over name and
+    description, ranked name prefix > name match > description match
+    """
+
+    def search(self, queryset, query):
+        return (
+            queryset
+            .filter(Q(name__icontains=query) | Q(description__icontains=query))
+            .annotate(
+                search_rank=Case(
+                    When(name__istartswith=query, then=Value(3)),
+                    When(name__icontains=query, then=Value(2)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+        )
+
+
+def search_vector(config=PostgresSearchBackend.config):
+    """
+    Must stay identical to the expression indexed in products migration 0005,
+    or the planner can't use product_search_vector_idx
+    """
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("name", "description", config=config)
+
+
+def get_search_backend():
+    """
+    settings.PRODUCT_SEARCH_BACKEND (dotted path) wins, otherwise pick by database vendor
+    """
+    backend_path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
@@ -0,0 +1,26 @@
+from django.db.models.functions import Substr
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .category_tree import invalidate_category_tree
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver(pre_delete, sender=Category)
+def reroot_subtree(sender, instance, **kwargs):
+    """
+    parent is SET_NULL on delete, so the deleted category's children become roots:
+    strip its path prefix from the whole subtree
+    """
+    if not instance.path:
+        return
+
+    Category.objects.filter(path__startswith=instance.path).exclude(pk=instance.pk).update(
+        path=Substr("path", len(instance.path) + 1)
+    )
@@ -1,3 +1,257 @@
+import base64
+import json
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ecommerce_backend.pagination import KeysetPaginator
+
+from .models import Category, Product, ProductImage, RelatedProduct
+
+
+def crafted_cursor(value, pk=1):
+    payload = json.dumps({"v": value, "id": pk})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+class CatalogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sarees = Category.objects.create(name="Sarees", slug="sarees")
+        cls.silk = Category.objects.create(name="Silk", slug="silk", parent=cls.sarees)
+        cls.cotton = Category.objects.create(name="Cotton", slug="cotton")
+        categories = [cls.sarees, cls.silk, cls.cotton]
+        Product.objects.bulk_create([
+            Product(
+                name=f"P{i:03d} {'silk' if i % 2 else 'plain'}",
+                slug=f"p{i}",
+                description="nice fabric",
+                category=categories[i % 3],
+                target_gender=["male", "female", "unisex"][i % 3],
+                price=100 + (i * 37) % 6000,
+                stock=5,
+            )
+            for i in range(60)
+        ])
+        cls.products = list(Product.objects.order_by("id"))
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f"products/{product.slug}-{n}.jpg")
+            for product in cls.products
+            for n in range(2)
+        ])
+
+
+class CatalogQueryCountTests(CatalogTestCase):
+    """
+    Catalog endpoints run a fixed number of queries whatever the page size:
+    no per-product category or image lookups
+    """
+
+    def assertQueriesPerPage(self, expected, url, params_list):
+        for params in params_list:
+            with self.subTest(url=url, params=params):
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+
+    def test_product_list(self):
+        self.assertQueriesPerPage(2, "/api/products/products/", [{"page_size": 5}, {"page_size": 40}])
+
+    def test_category_products(self):
+        self.assertQueriesPerPage(3, "/api/products/category/silk/", [{}])
+        self.assertQueriesPerPage(3, "/api/products/category/sarees/", [{}])
+
+    def test_filter(self):
+        self.assertQueriesPerPage(3, "/api/products/filter/", [{"page_size": 5}, {"page_size": 40}])
+
+    def test_related(self):
+        source = self.products[1]
+        RelatedProduct.objects.bulk_create([
+            RelatedProduct(product=source, related=related, score=1.0, rank=rank)
+            for rank, related in enumerate(self.products[2:5])
+        ])
+        self.assertQueriesPerPage(
+            2, "/api/products/related/", [{"product": source.pk, "limit": 2}, {"product": source.pk, "limit": 3}]
+        )
+        # Topped up from the category: neighbours, fallback and one images prefetch each
+        self.assertQueriesPerPage(
+            4, "/api/products/related/", [{"product": source.pk, "limit": 5}, {"product": source.pk, "limit": 10}]
+        )
+        self.assertQueriesPerPage(
+            2, "/api/products/related/", [{"category": "silk", "limit": 2}, {"category": "silk", "limit": 10}]
+        )
+
+
+class CursorPaginationTests(CatalogTestCase):
+    def test_cursor_walks_every_product_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"pagination": "cursor", "page_size": 7, "sort": "price-asc"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get("/api/products/filter/", params).json()
+            seen.extend(row["id"] for row in data["results"])
+            cursor = data["next"]
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(len(set(seen)), 60)
+
+    def test_crafted_cursor_values_are_rejected(self):
+        for sort, value in [
+            ("", None),
+            ("", [1]),
+            ("", "notadate"),
+            ("", {"a": 1}),
+            ("price-asc", "abc"),
+        ]:
+            with self.subTest(sort=sort, value=value):
+                response = self.client.get(
+                    "/api/products/filter/", {"cursor": crafted_cursor(value), "sort": sort}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+    def test_cursor_page_size_is_validated_and_capped(self):
+        for page_size in (-3, 0, "abc"):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(
+                    "/api/products/filter/", {"pagination": "cursor", "page_size": page_size}
+                )
+                self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/api/products/filter/", {"pagination": "cursor", "page_size": 100000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(KeysetPaginator(Product.objects.all(), "price", 100000, max_page_size=25).page_size, 25)
+
+
+class FacetCountTests(CatalogTestCase):
+    def facets(self, **params):
+        data = self.client.get("/api/products/filter/", {"include_facets": 1, **params}).json()
+        return data["count"], {row["name"]: row["count"] for row in data["facets"]["category"]}
+
+    def test_category_counts_include_subcategories_like_the_filter(self):
+        count, categories = self.facets(category_name="sarees")
+        self.assertEqual(count, 40)
+        self.assertEqual(categories, {"Sarees": 40, "Silk": 20, "Cotton": 20})
+
+    def test_exact_category_counts_without_descendants(self):
+        count, categories = self.facets(category_name="sarees", include_descendants=0)
+        self.assertEqual(count, 20)
+        self.assertEqual(categories, {"Sarees": 20, "Silk": 20, "Cotton": 20})
+
+    def test_parent_without_own_products_gets_rolled_up_count(self):
+        fabrics = Category.objects.create(name="Fabrics", slug="fabrics")
+        self.cotton.parent = fabrics
+        self.cotton.save()
+
+        count, categories = self.facets(category_name="fabrics")
+        self.assertEqual(count, 20)
+        self.assertEqual(categories["Fabrics"], 20)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are PostgreSQL specific")
+class CatalogIndexPlanTests(CatalogTestCase):
+    """
+    Every catalog filter/sort path must be servable by an index. Seq scans are
+    disabled so the tiny test table doesn't make the planner prefer them anyway.
+    """
+
+    def view_plan(self, url, params):
+        """
+        EXPLAIN of the paged product query the view actually runs for these params
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = next(
+            query["sql"] for query in captured
+            if query["sql"].startswith('SELECT "products_product"') and "ORDER BY" in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_catalog_paths_use_indexes(self):
+        Product.objects.filter(pk=self.products[0].pk).update(is_active=False)
+        cursor = {"pagination": "cursor"}
+        # (url, params, index, whether the index alone yields the page order)
+        cases = [
+            ("/api/products/products/", {}, "product_active_created_idx", True),
+            ("/api/products/filter/", {}, "product_active_created_idx", True),
+            ("/api/products/filter/", cursor, "product_active_created_idx", True),
+            ("/api/products/filter/", {"sort": "price-asc"}, "product_active_price_idx", True),
+            ("/api/products/filter/", {"sort": "price-desc"}, "product_active_price_idx", True),
+            ("/api/products/filter/", {"sort": "price-desc", **cursor}, "product_active_price_idx", True),
+            ("/api/products/filter/", {"sort": "alpha-asc"}, "product_active_name_idx", True),
+            ("/api/products/filter/", {"sort": "alpha-desc", **cursor}, "product_active_name_idx", True),
+            # Narrowed by index, then the (small) matching set is sorted
+            ("/api/products/filter/", {"category_name": "silk"}, "category_path_idx", False),
+            ("/api/products/filter/", {"target_gender": "female"}, "product_active_gender_idx", False),
+            ("/api/products/filter/", {"available": "0"}, "product_status_created_idx", False),
+        ]
+        for url, params, index_name, index_ordered in cases:
+            with self.subTest(url=url, params=params):
+                plan = self.view_plan(url, params)
+                self.assertNotIn("Seq Scan on products_product", plan)
+                self.assertIn(index_name, plan)
+                if index_ordered:
+                    self.assertNotIn("Sort", plan)
+
+    def test_search_uses_gin_indexes(self):
+        from .search import PostgresSearchBackend
+
+        queryset = PostgresSearchBackend().search(Product.objects.all(), "silk")
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan on products_product", plan)
+        self.assertIn("product_name_trgm_idx", plan)
+        self.assertIn("product_search_vector_idx", plan)
+
+
+class CategoryPathTests(TestCase):
+    def test_move_rewrites_subtree_paths(self):
+        sarees = Category.objects.create(name="Sarees", slug="sarees")
+        silk = Category.objects.create(name="Silk", slug="silk", parent=sarees)
+        kanj = Category.objects.create(name="Kanjivaram", slug="kanj", parent=silk)
+        candles = Category.objects.create(name="Candles", slug="candles")
+
+        silk.parent = candles
+        silk.save()
+
+        kanj.refresh_from_db()
+        self.assertEqual(kanj.path, f"{candles.pk}/{silk.pk}/{kanj.pk}/")
+
+    def test_cycle_detected_with_stale_instances(self):
+        sarees = Category.objects.create(name="Sarees", slug="sarees")
+        silk = Category.objects.create(name="Silk", slug="silk", parent=sarees)
+        kanj = Category.objects.create(name="Kanjivaram", slug="kanj", parent=silk)
+        candles = Category.objects.create(name="Candles", slug="candles")
+
+        # Move silk through a different instance; `kanj` and `candles` keep old paths
+        moved = Category.objects.get(pk=silk.pk)
+        moved.parent = candles
+        moved.save()
+
+        candles.parent = kanj
+        with self.assertRaises(ValueError):
+            candles.save()
+
+        candles.refresh_from_db()
+        self.assertIsNone(candles.parent_id)
+        self.assertEqual(candles.path, f"{candles.pk}/")
 
-# Create your tests here.
+        tree = self.client.get("/api/products/categories/tree/").json()
+        names = []
+        stack = list(tree)
+        while stack:
+            node = stack.pop()
+            names.append(node["name"])
+            stack.extend(node["children"])
+        self.assertCountEqual(names, ["Sarees", "Silk", "Kanjivaram", "Candles"])
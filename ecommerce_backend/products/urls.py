@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     CategoryListAPIView,
+    CategoryTreeAPIView,
     ProductListAPIView,
     CategoryWiseProductAPIView,
     ProductDetailAPIView,
@@ -10,6 +11,7 @@ from .views import (
 
 urlpatterns = [
     path("categories/", CategoryListAPIView.as_view()),
+    path("categories/tree/", CategoryTreeAPIView.as_view()),
     path("products/", ProductListAPIView.as_view()),
     path("filter/", ProductFilterAPIView.as_view()),
     path("related/", RelatedProductsAPIView.as_view()),
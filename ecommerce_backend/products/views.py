@@ -1,10 +1,19 @@
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import Q, Subquery
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework.permissions import AllowAny
 from django.core.paginator import Paginator, EmptyPage
+from ecommerce_backend.pagination import KeysetPaginator, InvalidCursor
 from .models import Category, Product
+from .search import get_search_backend
+from .facets import PRICE_RANGES, price_range_q, facet_counts
+from .category_tree import get_category_tree
+from .sampling import random_products
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
@@ -16,7 +25,7 @@ class CategoryListAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
         try:
-            qs = Category.objects.all()
+            qs = Category.objects.select_related("parent")
 
             name = request.GET.get("name")
             parent_name = request.GET.get("parent_name")
@@ -37,27 +46,80 @@ class CategoryListAPIView(APIView):
             )
 
 
+class CategoryTreeAPIView(APIView):
+    """
+    GET: Whole category tree as nested children, served from cache
+    (invalidated on Category save/delete, other workers refresh within a minute)
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_category_tree(), status=status.HTTP_200_OK)
+
+
 class ProductListAPIView(APIView):
+    """
+    GET: Active products, newest first, cursor paginated
+    Query params: page_size (max 100), cursor
+    stream=ndjson streams the whole catalog as one JSON object per line
+    """
     permission_classes = [AllowAny]
+    max_page_size = 100
+    stream_chunk_size = 500
+
     def get(self, request):
         try:
-            products = Product.objects.filter(is_active=True)
-            serializer = ProductListSerializer(products, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            products = Product.objects.for_listing().filter(is_active=True)
+
+            if request.GET.get("stream", "").strip().lower() == "ndjson":
+                return self.stream(request, products)
+
+            paginator = KeysetPaginator(
+                products, "-created_at", request.GET.get("page_size", 20), self.max_page_size
+            )
+            rows, next_cursor, previous_cursor = paginator.paginate(
+                request.GET.get("cursor", "").strip() or None
+            )
+
+            serializer = ProductListSerializer(rows, many=True, context={"request": request})
+            return Response({
+                "next": next_cursor,
+                "previous": previous_cursor,
+                "results": serializer.data,
+            }, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response({"error": str(e)}, status=400)
 
+    def stream(self, request, products):
+        """
+        Memory stays flat: rows (and their image prefetch) are fetched chunk by chunk
+        and each product is written out as soon as it is serialized
+        """
+        context = {"request": request}
+
+        def lines():
+            for product in products.order_by("id").iterator(chunk_size=self.stream_chunk_size):
+                data = ProductListSerializer(product, context=context).data
+                yield json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
 
 class CategoryWiseProductAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request, slug):
         try:
-            products = Product.objects.filter(
-                category__slug=slug,
-                is_active=True
+            # Includes products from child categories unless include_descendants=0
+            include_descendants = request.GET.get("include_descendants", "1").strip() != "0"
+            category_paths = Category.objects.filter(slug=slug).values_list("path", flat=True)
+
+            products = (
+                Product.objects.for_listing()
+                .filter(is_active=True)
+                .in_category_paths(list(category_paths), include_descendants)
             )
-            serializer = ProductListSerializer(products, many=True)
+            serializer = ProductListSerializer(products, many=True, context={"request": request})
             return Response(serializer.data, status=200)
 
         except Exception as e:
@@ -68,7 +130,12 @@ class ProductDetailAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request, slug):
         try:
-            product = Product.objects.get(slug=slug, is_active=True)
+            product = (
+                Product.objects
+                .select_related("category")
+                .prefetch_related("images")
+                .get(slug=slug, is_active=True)
+            )
             serializer = ProductDetailSerializer(product, context={"request": request}
 )
             return Response(serializer.data, status=200)
@@ -82,6 +149,8 @@ class ProductDetailAPIView(APIView):
 
 class ProductFilterAPIView(APIView):
     permission_classes = [AllowAny]
+    # Cursor mode only; page mode keeps its own page_size handling
+    max_page_size = 100
 
     def get(self, request):
 
@@ -89,20 +158,7 @@ class ProductFilterAPIView(APIView):
         # Base Queryset (Removed default is_active=True)
         # Because available will now control it
         # -------------------------
-        qs = (
-            Product.objects
-            .select_related("category")
-            .only(
-                "id",
-                "name",
-                "price",
-                "stock",
-                "target_gender",
-                "created_at",
-                "is_active",
-                "category__name",
-            )
-        )
+        qs = Product.objects.for_listing()
 
         # -------------------------
         # Get Query Params
@@ -125,16 +181,35 @@ class ProductFilterAPIView(APIView):
             # Default: only active products
             qs = qs.filter(is_active=True)
 
+        # -------------------------
+        # Search Filter
+        # -------------------------
+        if search:
+            qs = get_search_backend().search(qs, search)
+
+        # Facet counts are computed before the facet filters below are applied
+        facet_qs = qs
+
         # -------------------------
         # Category Filter
+        # Matches the category and its subcategories
+        # (include_descendants=0 → exact category only)
         # -------------------------
+        include_descendants = request.GET.get("include_descendants", "1").strip() != "0"
+        category_paths = None
         if category_name:
-            qs = qs.filter(category__name__iexact=category_name)
+            category_paths = list(
+                Category.objects
+                .filter(name__iexact=category_name)
+                .values_list("path", flat=True)
+            )
+            qs = qs.in_category_paths(category_paths, include_descendants)
 
         # -------------------------
         # Target Gender Filter
         # Example: target_gender=MEN,Women
         # -------------------------
+        genders = []
         if target_gender:
             genders = [
                 g.strip()
@@ -145,42 +220,33 @@ class ProductFilterAPIView(APIView):
                 qs = qs.filter(target_gender__in=genders)
 
         # -------------------------
-        # Price Range Filter (FIXED LOGIC)
+        # Price Range Filter (buckets in facets.PRICE_RANGES)
         # 1 = <= 500
         # 2 = 500 - 999
         # 3 = 1000 - 4999
         # 4 = 5000+
         # -------------------------
+        range_ids = []
         if price_ranges:
-            try:
-                range_ids = [
-                    int(p.strip())
-                    for p in price_ranges.split(",")
-                    if p.strip().isdigit()
-                ]
-
-                price_filter = Q()
-                for rid in range_ids:
-                    if rid == 1:
-                        price_filter |= Q(price__lte=500)
-                    elif rid == 2:
-                        price_filter |= Q(price__gte=500, price__lte=999)
-                    elif rid == 3:
-                        price_filter |= Q(price__gte=1000, price__lte=4999)
-                    elif rid == 4:
-                        price_filter |= Q(price__gte=5000)
-
-                if price_filter:
-                    qs = qs.filter(price_filter)
-
-            except Exception:
-                pass
+            range_ids = [
+                int(p.strip())
+                for p in price_ranges.split(",")
+                if p.strip().isdigit() and int(p.strip()) in PRICE_RANGES
+            ]
+
+            price_filter = Q()
+            for rid in range_ids:
+                price_filter |= price_range_q(rid)
+
+            if price_filter:
+                qs = qs.filter(price_filter)
 
         # -------------------------
-        # Search Filter
+        # Facets (opt-in: include_facets=1)
         # -------------------------
-        if search:
-            qs = qs.filter(name__icontains=search)
+        facets = None
+        if request.GET.get("include_facets", "").strip() == "1":
+            facets = facet_counts(facet_qs, category_paths, include_descendants, genders, range_ids)
 
         # -------------------------
         # Sorting
@@ -192,15 +258,48 @@ class ProductFilterAPIView(APIView):
             "alpha-desc": "-name",
         }
 
-        qs = qs.order_by(sort_map.get(sort, "-created_at"))
+        # Search results default to relevance order
+        default_ordering = "-search_rank" if search else "-created_at"
+        ordering = sort_map.get(sort, default_ordering)
+
+        # -------------------------
+        # Cursor Pagination (opt-in)
+        # pagination=cursor or cursor=<token>
+        # count is only computed with include_count=1
+        # -------------------------
+        cursor = request.GET.get("cursor", "").strip()
+        if cursor or request.GET.get("pagination", "").strip().lower() == "cursor":
+            try:
+                paginator = KeysetPaginator(
+                    qs, ordering, request.GET.get("page_size", 20), self.max_page_size
+                )
+                rows, next_cursor, previous_cursor = paginator.paginate(cursor or None)
+            except InvalidCursor as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = ProductListSerializer(rows, many=True, context={"request": request})
+            data = {
+                "next": next_cursor,
+                "previous": previous_cursor,
+                "results": serializer.data,
+            }
+            if request.GET.get("include_count", "").strip() == "1":
+                data["count"] = qs.count()
+            if facets is not None:
+                data["facets"] = facets
+
+            return Response(data, status=status.HTTP_200_OK)
+
+        # Tiebreaker in the same direction as the sort, so (field, id) indexes
+        # serve both directions with a plain forward or backward scan
+        qs = qs.order_by(ordering, "-id" if ordering.startswith("-") else "id")
 
         # -------------------------
         # Pagination
         # -------------------------
         page_number = request.GET.get("page", 1)
-        page_size = int(request.GET.get("page_size", 20))
 
-        paginator = Paginator(qs, page_size)
+        paginator = Paginator(qs, int(request.GET.get("page_size", 20)))
 
         try:
             page_obj = paginator.page(page_number)
@@ -212,17 +311,23 @@ class ProductFilterAPIView(APIView):
 
         serializer = ProductListSerializer(page_obj, many=True,context={"request": request})
 
-        return Response({
+        data = {
             "count": paginator.count,
             "total_pages": paginator.num_pages,
             "current_page": int(page_number),
             "results": serializer.data
-        }, status=status.HTTP_200_OK)
+        }
+        if facets is not None:
+            data["facets"] = facets
+
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class RelatedProductsAPIView(APIView):
     """
-    Get related products based on category or child_category
+    Get related products based on category or child_category.
+    product=<id or slug> serves precomputed co-purchase neighbours
+    (compute_related_products), topped up from the product's category.
     """
     permission_classes = [AllowAny]
 
@@ -230,10 +335,22 @@ class RelatedProductsAPIView(APIView):
         try:
             category = request.GET.get("category", "").strip()
             child_category = request.GET.get("child_category", "").strip()
+            product = request.GET.get("product", "").strip()
             limit = int(request.GET.get("limit", 6))
 
             # Base queryset - only active products
-            qs = Product.objects.filter(is_active=True).select_related("category")
+            qs = Product.objects.for_listing().filter(is_active=True)
+
+            if product:
+                serializer = ProductListSerializer(
+                    self.bought_together(qs, product, limit),
+                    many=True,
+                    context={"request": request}
+                )
+                return Response({
+                    "results": serializer.data,
+                    "count": len(serializer.data)
+                }, status=status.HTTP_200_OK)
 
             # Filter by category if provided
             if category:
@@ -251,12 +368,9 @@ class RelatedProductsAPIView(APIView):
 
             # If no filters provided, return random products
             if not category and not child_category:
-                qs = qs.order_by("?")
+                qs = random_products(qs, limit)
             else:
-                qs = qs.order_by("-created_at")
-
-            # Limit results
-            qs = qs[:limit]
+                qs = qs.order_by("-created_at")[:limit]
 
             serializer = ProductListSerializer(qs, many=True, context={"request": request})
 
@@ -269,4 +383,25 @@ class RelatedProductsAPIView(APIView):
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+    def bought_together(self, qs, product, limit):
+        lookup = {"pk": int(product)} if product.isdigit() else {"slug": product}
+        source = Product.objects.filter(**lookup)
+
+        # One indexed read of the precomputed neighbour list
+        rows = list(
+            qs.filter(**{f"recommended_for__product__{k}": v for k, v in lookup.items()})
+            .order_by("recommended_for__rank")[:limit]
+        )
+
+        # Fall back to newest products of the same category
+        if len(rows) < limit:
+            rows += list(
+                qs.filter(category_id=Subquery(source.values("category_id")[:1]))
+                .exclude(pk__in=Subquery(source.values("pk")))
+                .exclude(pk__in=[row.pk for row in rows])
+                .order_by("-created_at")[:limit - len(rows)]
+            )
+
+        return rows
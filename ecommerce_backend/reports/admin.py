@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import DailyProductSales, DailyCategorySales, DailyStatusSales
+# Register your models here.
+admin.site.register(DailyProductSales)
+admin.site.register(DailyCategorySales)
+admin.site.register(DailyStatusSales)
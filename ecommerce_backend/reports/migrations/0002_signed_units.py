@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailycategorysales',
+            name='units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dailyproductsales',
+            name='units',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from products.models import Category, Product
+
+
+class DailyProductSales(models.Model):
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [['date', 'product']]
+
+    def __str__(self):
+        return f"{self.date} - product {self.product_id}: {self.units}"
+
+
+class DailyCategorySales(models.Model):
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [['date', 'category']]
+
+    def __str__(self):
+        return f"{self.date} - category {self.category_id}: {self.units}"
+
+
+class DailyStatusSales(models.Model):
+    """
+    Orders and revenue per order creation day and *current* status
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = [['date', 'status']]
+
+    def __str__(self):
+        return f"{self.date} - {self.status}: {self.orders}"
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from orders.models import OrderItem
+from .models import DailyCategorySales, DailyProductSales, DailyStatusSales
+
+
+def increment(model, key_fields, rows):
+    """
+    Add {key tuple: (count, revenue)} onto a rollup table with one multi-row
+    INSERT ... ON CONFLICT (keys) DO UPDATE SET col = col + EXCLUDED.col
+    """
+    if not rows:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    count_field = "orders" if model is DailyStatusSales else "units"
+    key_columns = [model._meta.get_field(name).column for name in key_fields]
+    columns = key_columns + [count_field, "revenue"]
+
+    # NULL never conflicts, so keys with a NULL (deleted product / category)
+    # go through increment_null_keys instead of piling up stray rows
+    null_rows = {key: value for key, value in rows.items() if None in key}
+    rows = {key: value for key, value in rows.items() if None not in key}
+    increment_null_keys(model, key_columns, count_field, null_rows)
+    if not rows:
+        return
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    params = []
+    # Fixed key order so concurrent checkouts lock rollup rows in the same order
+    for key, (count, revenue) in sorted(rows.items(), key=lambda row: tuple(map(str, row[0]))):
+        params.extend([*key, count, revenue])
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(qn(c) for c in key_columns)}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = {table}.{qn(c)} + EXCLUDED.{qn(c)}" for c in (count_field, "revenue"))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def increment_null_keys(model, key_columns, count_field, rows):
+    """
+    Keys with a NULL column share one row per remaining key: add onto the
+    oldest such row, or insert it when there is none
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+
+    with connection.cursor() as cursor:
+        for key, (count, revenue) in rows.items():
+            where = " AND ".join(
+                f"{qn(column)} IS NULL" if value is None else f"{qn(column)} = %s"
+                for column, value in zip(key_columns, key)
+            )
+            key_params = [value for value in key if value is not None]
+            cursor.execute(
+                f"UPDATE {table} SET {qn(count_field)} = {qn(count_field)} + %s, "
+                f"{qn('revenue')} = {qn('revenue')} + %s "
+                f"WHERE {qn('id')} = (SELECT MIN({qn('id')}) FROM {table} WHERE {where})",
+                [count, revenue, *key_params],
+            )
+            if cursor.rowcount == 0:
+                model.objects.create(
+                    **{column: value for column, value in zip(key_columns, key)},
+                    **{count_field: count, "revenue": revenue},
+                )
+
+
+def order_date(order):
+    return timezone.localdate(order.created_at)
+
+
+def record_items(lines, sign=1):
+    """
+    Add (or with sign=-1 take back) order lines on the product and category rollups.
+    lines: iterable of (day, product_id, category_id, quantity, price)
+    """
+    products = defaultdict(lambda: [0, Decimal(0)])
+    categories = defaultdict(lambda: [0, Decimal(0)])
+
+    for day, product_id, category_id, quantity, price in lines:
+        for bucket in (products[(day, product_id)], categories[(day, category_id)]):
+            bucket[0] += sign * quantity
+            bucket[1] += sign * quantity * price
+
+    increment(DailyProductSales, ["date", "product"], products)
+    increment(DailyCategorySales, ["date", "category"], categories)
+
+
+def record_order(order, order_items):
+    """
+    Fold a freshly placed order into the daily rollups (3 statements).
+    order_items need their product snapshot taken (category_id).
+    """
+    day = order_date(order)
+    record_items(
+        (day, item.product_id, item.category_id, item.quantity, item.price)
+        for item in order_items
+    )
+    increment(DailyStatusSales, ["date", "status"], {(day, order.status): (1, order.total_amount)})
+
+
+def record_cancellations(order_ids):
+    """
+    Cancelled orders stop counting as product / category sales (the status
+    rollup already moved them to "cancelled"). Units come off the category
+    snapshotted at checkout, where record_order put them.
+    """
+    lines = (
+        OrderItem.objects
+        .filter(order_id__in=order_ids)
+        .values_list("order__created_at", "product_id", "category_id", "quantity", "price")
+    )
+    record_items((
+        (timezone.localdate(created_at), product_id, category_id, quantity, price)
+        for created_at, product_id, category_id, quantity, price in lines
+    ), sign=-1)
+
+
+def record_status_changes(changes, to_status):
+    """
+    Move orders between status rollups.
+    changes: iterable of (created_at, from_status, total_amount)
+    """
+    rows = defaultdict(lambda: [0, Decimal(0)])
+    for created_at, from_status, total_amount in changes:
+        day = timezone.localdate(created_at)
+        rows[(day, from_status)][0] -= 1
+        rows[(day, from_status)][1] -= total_amount
+        rows[(day, to_status)][0] += 1
+        rows[(day, to_status)][1] += total_amount
+
+    increment(DailyStatusSales, ["date", "status"], rows)
@@ -0,0 +1,139 @@
+import threading
+import time
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from cart.checkout import place_order
+from cart.models import Cart, CartItem
+from orders.state_machine import bulk_transition
+from products.models import Category, Product
+from users.models import User
+
+from .models import DailyCategorySales, DailyProductSales, DailyStatusSales
+
+
+class RollupFixtures:
+    def setUp(self):
+        self.category = Category.objects.create(name="Silk", slug="silk")
+        self.products = [
+            Product.objects.create(
+                name=f"Saree {i}", slug=f"saree-{i}", description="", category=self.category,
+                price=100 * (i + 1), stock=10
+            )
+            for i in range(2)
+        ]
+
+    def checkout(self, email):
+        user = User.objects.create_user(email=email, username=email, password="pass12345")
+        cart = Cart.objects.create(user=user)
+        for product in self.products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        return place_order(user)
+
+
+class SalesRollupTests(RollupFixtures, TestCase):
+    def snapshot(self):
+        return {
+            model.__name__: sorted(model.objects.values_list(*fields))
+            for model, fields in (
+                (DailyProductSales, ("date", "product_id", "units", "revenue")),
+                (DailyCategorySales, ("date", "category_id", "units", "revenue")),
+                (DailyStatusSales, ("date", "status", "orders", "revenue")),
+            )
+        }
+
+    def test_cancelled_orders_leave_product_and_category_rollups(self):
+        kept = self.checkout("a@example.com")
+        cancelled = self.checkout("b@example.com")
+        bulk_transition([kept.pk], "paid")
+        bulk_transition([cancelled.pk], "cancelled")
+
+        self.assertEqual(
+            sorted(DailyProductSales.objects.values_list("product_id", "units", "revenue")),
+            [(self.products[0].pk, 2, 200), (self.products[1].pk, 2, 400)],
+        )
+        self.assertEqual(list(DailyCategorySales.objects.values_list("units", "revenue")), [(4, 600)])
+        self.assertEqual(
+            sorted(DailyStatusSales.objects.filter(orders__gt=0).values_list("status", "orders")),
+            [("cancelled", 1), ("paid", 1)],
+        )
+
+    def test_rebuild_matches_incremental_rollups(self):
+        kept = self.checkout("a@example.com")
+        cancelled = self.checkout("b@example.com")
+        bulk_transition([kept.pk], "paid")
+        bulk_transition([cancelled.pk], "cancelled")
+
+        incremental = self.snapshot()
+        # Incremental rollups keep emptied status rows around; rebuild doesn't create them
+        incremental["DailyStatusSales"] = [row for row in incremental["DailyStatusSales"] if row[2]]
+
+        call_command("rebuild_sales_rollups", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_cancellation_takes_units_from_category_at_purchase(self):
+        order = self.checkout("a@example.com")
+        cotton = Category.objects.create(name="Cotton", slug="cotton")
+        Product.objects.filter(pk=self.products[0].pk).update(category=cotton)
+
+        bulk_transition([order.pk], "cancelled")
+
+        self.assertEqual(
+            sorted(DailyCategorySales.objects.values_list("category_id", "units", "revenue")),
+            [(self.category.pk, 0, 0)],
+        )
+
+    def test_cancellation_of_deleted_product_leaves_no_stray_rows(self):
+        order = self.checkout("a@example.com")
+        self.products[0].delete()
+
+        bulk_transition([order.pk], "cancelled")
+
+        self.assertEqual(
+            list(DailyProductSales.objects.filter(product__isnull=True).values_list("units", "revenue")),
+            [(0, 0)],
+        )
+        self.assertEqual(DailyProductSales.objects.aggregate(units=Sum("units"))["units"], 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs table locks under real concurrency")
+class RebuildConcurrencyTests(RollupFixtures, TransactionTestCase):
+    def test_rebuild_waits_for_checkout_in_flight(self):
+        self.checkout("a@example.com")
+        ordered = threading.Event()
+        errors = []
+
+        def slow_checkout():
+            try:
+                with transaction.atomic():
+                    self.checkout("b@example.com")
+                    ordered.set()
+                    time.sleep(0.5)
+            finally:
+                connection.close()
+
+        def rebuild():
+            try:
+                ordered.wait()
+                call_command("rebuild_sales_rollups", stdout=open("/dev/null", "w"))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=slow_checkout), threading.Thread(target=rebuild)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(DailyProductSales.objects.values_list("product_id", "units")),
+            [(self.products[0].pk, 4), (self.products[1].pk, 4)],
+        )
+        self.assertEqual(list(DailyStatusSales.objects.values_list("status", "orders")), [("pending", 2)])
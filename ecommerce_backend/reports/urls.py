@@ -0,0 +1,17 @@
+from django.urls import path
+from .views import (
+    DailySalesAPIView,
+    ProductSalesAPIView,
+    CategorySalesAPIView,
+)
+
+urlpatterns = [
+    # Orders / revenue per day and status
+    path("sales/daily/", DailySalesAPIView.as_view(), name="sales-daily"),
+
+    # Best selling products
+    path("sales/products/", ProductSalesAPIView.as_view(), name="sales-products"),
+
+    # Sales per category
+    path("sales/categories/", CategorySalesAPIView.as_view(), name="sales-categories"),
+]
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from .models import DailyCategorySales, DailyProductSales, DailyStatusSales
+
+
+def date_range(request):
+    """
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD, default the last 30 days
+    """
+    today = timezone.localdate()
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    return (
+        date.fromisoformat(start) if start else today - timedelta(days=29),
+        date.fromisoformat(end) if end else today,
+    )
+
+
+class DailySalesAPIView(APIView):
+    """
+    GET: Orders and revenue per day and status (rollups only), cancelled orders
+    under their own status
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            start, end = date_range(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            DailyStatusSales.objects
+            .filter(date__range=(start, end))
+            .order_by("date", "status")
+            .values("date", "status", "orders", "revenue")
+        )
+        return Response({"start": start, "end": end, "results": list(rows)})
+
+
+class ProductSalesAPIView(APIView):
+    """
+    GET: Units and revenue per product over the range, best sellers first (rollups only).
+    Cancelled orders are excluded (taken back out when the order is cancelled).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            start, end = date_range(request)
+            limit = int(request.GET.get("limit", 50))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            DailyProductSales.objects
+            .filter(date__range=(start, end))
+            .values("product_id", "product__name")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue")[:limit]
+        )
+        return Response({"start": start, "end": end, "results": list(rows)})
+
+
+class CategorySalesAPIView(APIView):
+    """
+    GET: Units and revenue per category over the range (rollups only).
+    Cancelled orders are excluded (taken back out when the order is cancelled).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            start, end = date_range(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            DailyCategorySales.objects
+            .filter(date__range=(start, end))
+            .values("category_id", "category__name")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue")
+        )
+        return Response({"start": start, "end": end, "results": list(rows)})
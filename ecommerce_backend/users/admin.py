@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Address
+from .models import User, Address, RevokedToken
 # Register your models here.
 # admin.site.register(User)
-admin.site.register(Address)
\ No newline at end of file
+admin.site.register(Address)
+admin.site.register(RevokedToken)
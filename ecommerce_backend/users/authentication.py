@@ -1,4 +1,9 @@
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .denylist import is_token_revoked
+from .user_cache import user_cache
 
 
 class CookieJWTAuthentication(JWTAuthentication):
@@ -9,4 +14,76 @@ class CookieJWTAuthentication(JWTAuthentication):
             return None
 
         validated_token = self.get_validated_token(raw_token)
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
         return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        """
+        Serve the user from users.user_cache, falling back to the primary key
+        lookup (and its is_active / revoke checks) on a miss
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if user_id is None or jti is None:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id, jti)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, jti, user)
+        return user
+
+
+class TrustedClaimsUser:
+    """
+    request.user built from signed token claims (see users.tokens): id, email,
+    is_active and role are answered without a query. Touching any other
+    attribute loads the real User row once and delegates to it.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.id = self.pk = token[api_settings.USER_ID_CLAIM]
+        self.email = token["email"]
+        self.is_active = token["is_active"]
+        self.role = token["role"]
+        self.is_staff = self.role == "staff"
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_user":
+            raise AttributeError(name)
+        if self._user is None:
+            from .models import User
+            self._user = User.objects.get(pk=self.pk)
+        return getattr(self._user, name)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.email
+
+
+class TrustedClaimsJWTAuthentication(CookieJWTAuthentication):
+    """
+    Zero-query authentication for hot read endpoints that only need request.user.id.
+    Opt in per view with authentication_classes; views must filter on
+    user_id=request.user.id rather than passing request.user as a model instance,
+    and must not write rows for it: the user is never looked up, so a still-valid
+    token may belong to a deleted user.
+    Tokens issued before the claims existed fall back to the cached user lookup.
+    """
+
+    def get_user(self, validated_token):
+        if "role" not in validated_token or api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return TrustedClaimsUser(validated_token)
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken
+
+
+DEFAULTS = {
+    "CAPACITY": 100_000,       # minimum sized-for entries; the filter is rebuilt larger when full
+    "ERROR_RATE": 0.001,       # false positive rate (each costs one confirming query)
+    "REFRESH_INTERVAL": 5,     # seconds between incremental syncs from the table
+    "REBUILD_INTERVAL": 3600,  # seconds between full rebuilds (drops purged entries)
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "TOKEN_DENYLIST", {})}
+
+
+def family_key(family):
+    return f"family:{family}"
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenDenylist:
+    """
+    RevokedToken table with an in-process bloom filter in front of it.
+
+    A bloom miss answers "not revoked" with no query, which is every request
+    in the common case; a hit is confirmed against the table. Each process pulls
+    rows created since its last sync every REFRESH_INTERVAL seconds (the window
+    overlaps by one interval so rows committed late aren't skipped), so a
+    revocation made by another worker takes effect within that interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0
+        self._synced_at = 0
+        self._synced_until = None
+
+    def _rebuild(self, config):
+        now = timezone.now()
+        live = RevokedToken.objects.filter(expires_at__gt=now).values_list("jti", flat=True)
+        bloom = BloomFilter(max(config["CAPACITY"], live.count() * 2), config["ERROR_RATE"])
+        for jti in live.iterator(chunk_size=5000):
+            bloom.add(jti)
+
+        self._bloom = bloom
+        self._built_at = self._synced_at = time.monotonic()
+        self._synced_until = now
+
+    def _sync(self):
+        config = get_config()
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._bloom is None
+                or now - self._built_at > config["REBUILD_INTERVAL"]
+                or self._bloom.count > self._bloom.capacity
+            ):
+                self._rebuild(config)
+            elif now - self._synced_at > config["REFRESH_INTERVAL"]:
+                since = self._synced_until - timedelta(seconds=config["REFRESH_INTERVAL"])
+                self._synced_until = timezone.now()
+                self._synced_at = now
+                for jti in RevokedToken.objects.filter(created_at__gte=since).values_list("jti", flat=True):
+                    self._bloom.add(jti)
+
+    def is_revoked(self, *keys):
+        keys = [key for key in keys if key]
+        self._sync()
+        candidates = [key for key in keys if key in self._bloom]
+        if not candidates:
+            return False
+        return RevokedToken.objects.filter(jti__in=candidates, expires_at__gt=timezone.now()).exists()
+
+    def revoke(self, key, expires_at):
+        """
+        Returns False if the key was already revoked
+        """
+        _, created = RevokedToken.objects.get_or_create(jti=key, defaults={"expires_at": expires_at})
+        self._sync()
+        with self._lock:
+            self._bloom.add(key)
+        return created
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+denylist = TokenDenylist()
+
+
+def is_token_revoked(token):
+    family = token.get("fam")
+    return denylist.is_revoked(
+        token.get(api_settings.JTI_CLAIM),
+        family_key(family) if family else None,
+    )
+
+
+def revoke_token(token):
+    return denylist.revoke(token[api_settings.JTI_CLAIM], datetime_from_epoch(token["exp"]))
+
+
+def revoke_family(family):
+    """
+    Kill every refresh and access token descended from one login
+    """
+    return denylist.revoke(family_key(family), timezone.now() + api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+def purge_expired():
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,90 @@
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+# Cost parameters, overridable per algorithm through settings.PASSWORD_HASHER_PARAMS.
+# Raising or lowering them rehashes each user's password on their next login
+# (the hasher's must_update() compares the stored parameters to these).
+DEFAULT_PARAMS = {
+    # OWASP baseline: 19 MiB, 2 iterations, 1 lane
+    "argon2": {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},
+    # 32 MiB (128 * n * r), single lane
+    "scrypt": {"work_factor": 2**15, "block_size": 8, "parallelism": 1},
+}
+
+
+def hasher_params(algorithm):
+    return {
+        **DEFAULT_PARAMS[algorithm],
+        **getattr(settings, "PASSWORD_HASHER_PARAMS", {}).get(algorithm, {}),
+    }
+
+
+def scrypt_maxmem(n, r, p):
+    # hashlib.scrypt refuses anything over 32 MiB unless told otherwise
+    return 2 * 128 * n * r * p
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with cost parameters from settings instead of Django's
+    100 MiB / 8 lane defaults
+    """
+
+    @property
+    def time_cost(self):
+        return hasher_params("argon2")["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return hasher_params("argon2")["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return hasher_params("argon2")["parallelism"]
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt with cost parameters from settings instead of Django's 5 lane default
+    """
+
+    @property
+    def work_factor(self):
+        return hasher_params("scrypt")["work_factor"]
+
+    @property
+    def block_size(self):
+        return hasher_params("scrypt")["block_size"]
+
+    @property
+    def parallelism(self):
+        return hasher_params("scrypt")["parallelism"]
+
+    @property
+    def maxmem(self):
+        params = hasher_params("scrypt")
+        return scrypt_maxmem(params["work_factor"], params["block_size"], params["parallelism"])
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # verify() re-encodes with the n / r / p stored in the hash, which can be
+        # higher than the current settings after they are lowered, so the memory
+        # limit follows the parameters actually used rather than self.maxmem
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=scrypt_maxmem(n, r, p),
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return "%s$%d$%s$%d$%d$%s" % (self.algorithm, n, salt, r, p, hash_)
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+from users.user_cache import get_config, user_cache
+
+
+class Command(BaseCommand):
+    help = "Measure authenticated request throughput with the JWT user cache off and on"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True, help="Existing user to authenticate as")
+        parser.add_argument("--path", default="/api/cart/cart-summary/")
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        client = Client()
+        client.cookies["access_token"] = str(RefreshToken.for_user(user).access_token)
+
+        for label, timeout in (("uncached", 0), ("cached", get_config()["TIMEOUT"] or 30)):
+            user_cache.clear()
+            with override_settings(
+                ALLOWED_HOSTS=["testserver"],
+                AUTH_USER_CACHE={**get_config(), "TIMEOUT": timeout},
+            ):
+                # Warm up (and prime the cache) outside the measurement
+                response = client.get(options["path"])
+                if response.status_code != 200:
+                    raise CommandError(f"{options['path']} returned {response.status_code}")
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(options["requests"]):
+                        client.get(options["path"])
+                    elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{label:>8}: {options['requests'] / elapsed:.0f} req/s, "
+                f"{len(queries) / options['requests']:.1f} queries/request"
+            )
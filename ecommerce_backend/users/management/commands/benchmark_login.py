@@ -0,0 +1,77 @@
+import importlib.util
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from users.models import User
+from users.serializers import LoginSerializer, RegisterSerializer
+
+
+HASHERS = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "scrypt": "users.hashers.TunedScryptPasswordHasher",
+    "argon2": "users.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD = "bench-Password-123"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure login and register throughput (per core) for each password hasher"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=50)
+        parser.add_argument("--registers", type=int, default=20)
+        parser.add_argument("--hashers", nargs="+", choices=list(HASHERS), help="Default: all available")
+
+    def handle(self, *args, **options):
+        names = options["hashers"] or [
+            name for name in HASHERS
+            if name != "argon2" or importlib.util.find_spec("argon2") is not None
+        ]
+        self.stdout.write(f"Single process; {os.cpu_count()} cores available")
+
+        for name in names:
+            hashers = [HASHERS[name]] + [h for h in settings.PASSWORD_HASHERS if h != HASHERS[name]]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                try:
+                    # Everything the benchmark writes is rolled back
+                    with transaction.atomic():
+                        logins = self.bench_logins(name, options["logins"])
+                        registers = self.bench_registers(name, options["registers"])
+                        raise Rollback
+                except Rollback:
+                    pass
+
+            self.stdout.write(
+                f"{name:>7}: {logins:8.1f} logins/sec/core, {registers:8.1f} registers/sec/core"
+            )
+
+    def bench_logins(self, name, count):
+        email = f"bench-login-{name}@example.com"
+        User.objects.create_user(email=email, username=f"bench-login-{name}", password=PASSWORD)
+
+        started = time.perf_counter()
+        for _ in range(count):
+            LoginSerializer(data={"email": email, "password": PASSWORD}).is_valid(raise_exception=True)
+        return count / (time.perf_counter() - started)
+
+    def bench_registers(self, name, count):
+        started = time.perf_counter()
+        for i in range(count):
+            serializer = RegisterSerializer(data={
+                "email": f"bench-register-{name}-{i}@example.com",
+                "username": f"bench-register-{name}-{i}",
+                "phone": f"+{900000000 + i}",
+                "password": PASSWORD,
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.denylist import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete denylist entries whose tokens have expired (once, or every --interval seconds)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and purge every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+
+        while True:
+            purged = purge_expired()
+            self.stdout.write(f"Purged {purged} expired revoked tokens")
+
+            if interval <= 0:
+                break
+            time.sleep(interval)
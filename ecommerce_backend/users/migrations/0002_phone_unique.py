@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+
+def blank_phones_to_null(apps, schema_editor):
+    """
+    "" would collide in the unique index, NULLs don't
+    """
+    User = apps.get_model('users', 'User')
+    User.objects.filter(phone='').update(phone=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_phones_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='phone',
+            field=models.CharField(blank=True, max_length=15, null=True, unique=True),
+        ),
+    ]
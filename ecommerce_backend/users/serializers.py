@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from .models import User
 
 
@@ -9,21 +10,27 @@ class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("email", "username", "phone", "password")
+        # Uniqueness is enforced by the unique index on User.phone (see create)
+        extra_kwargs = {"phone": {"validators": []}}
 
     def validate_phone(self, value):
-        if User.objects.filter(phone=value).exists():
-            raise serializers.ValidationError(
-                "Mobile number already registered"
-            )
-        return value
+        # Blank numbers are stored as NULL so they don't collide in the unique index
+        return value or None
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            email=validated_data["email"],
-            username=validated_data["username"],
-            phone=validated_data.get("phone"),
-            password=validated_data["password"],
-        )
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email=validated_data["email"],
+                    username=validated_data["username"],
+                    phone=validated_data.get("phone"),
+                    password=validated_data["password"],
+                )
+        except IntegrityError:
+            phone = validated_data.get("phone")
+            if phone and User.objects.filter(phone=phone).exists():
+                raise serializers.ValidationError({"phone": ["Mobile number already registered"]})
+            raise
         return user
 
 
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .authentication import CookieJWTAuthentication, TrustedClaimsJWTAuthentication, TrustedClaimsUser
+from .denylist import denylist, family_key, get_config, purge_expired
+from .models import RevokedToken, User
+from .tokens import tokens_for_user
+from .user_cache import get_config as user_cache_config, user_cache
+
+
+SCRYPT_ONLY = ["users.hashers.TunedScryptPasswordHasher"]
+
+
+def login(client, email, password="pass12345"):
+    return client.post(
+        "/api/users/login/", {"email": email, "password": password}, content_type="application/json"
+    )
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_ONLY)
+class PasswordHasherTests(TestCase):
+    def test_lowering_scrypt_cost_still_verifies_and_rehashes(self):
+        with override_settings(PASSWORD_HASHER_PARAMS={"scrypt": {"work_factor": 2**15}}):
+            user = User.objects.create_user(email="buyer@example.com", username="buyer", password="pass12345")
+        self.assertTrue(user.password.startswith("scrypt$32768$"))
+
+        with override_settings(PASSWORD_HASHER_PARAMS={"scrypt": {"work_factor": 2**14}}):
+            response = login(self.client, "buyer@example.com")
+
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$16384$"))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        denylist.reset()
+        self.user = User.objects.create_user(email="buyer@example.com", username="buyer", password="pass12345")
+        self.assertEqual(login(self.client, "buyer@example.com").status_code, 200)
+
+    def cookies(self):
+        return {name: self.client.cookies[name].value for name in ("access_token", "refresh_token")}
+
+    def use(self, cookies):
+        self.client.cookies.clear()
+        for name, value in cookies.items():
+            self.client.cookies[name] = value
+
+    def refresh(self, cookies):
+        self.use(cookies)
+        return self.client.post("/api/users/refresh/")
+
+    def authenticated_get(self, cookies):
+        self.use(cookies)
+        return self.client.get("/api/cart/cart-summary/")
+
+    def test_refresh_rotates_and_reuse_revokes_the_session(self):
+        first = self.cookies()
+        self.assertEqual(self.refresh(first).status_code, 200)
+        second = self.cookies()
+        self.assertNotEqual(second["refresh_token"], first["refresh_token"])
+        self.assertEqual(self.authenticated_get(second).status_code, 200)
+
+        # The rotated-out refresh token shows up again: it leaked
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["error"], "Refresh token reuse detected")
+
+        # ...so every token of that login is dead, including the newest ones
+        self.assertEqual(self.authenticated_get(second).status_code, 401)
+        self.assertEqual(self.refresh(second).status_code, 401)
+
+    def test_other_logins_survive_a_revoked_session(self):
+        other = Client()
+        login(other, "buyer@example.com")
+        self.refresh(self.cookies())
+        self.client.post("/api/users/logout/")
+
+        self.assertEqual(other.get("/api/cart/cart-summary/").status_code, 200)
+
+    def test_logout_rejects_the_access_token(self):
+        cookies = self.cookies()
+        self.assertEqual(self.authenticated_get(cookies).status_code, 200)
+
+        self.client.post("/api/users/logout/")
+
+        self.assertEqual(self.authenticated_get(cookies).status_code, 401)
+        self.assertEqual(self.refresh(cookies).status_code, 401)
+
+    def test_revocation_by_another_worker_applies_after_refresh_interval(self):
+        cookies = self.cookies()
+        self.assertEqual(self.authenticated_get(cookies).status_code, 200)
+
+        # Another process revokes the session: only the table changes, not our bloom filter
+        RevokedToken.objects.create(
+            jti=family_key(AccessToken(cookies["access_token"])["fam"]),
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        self.assertEqual(self.authenticated_get(cookies).status_code, 200)
+
+        later = time.monotonic() + get_config()["REFRESH_INTERVAL"] + 1
+        with mock.patch("users.denylist.time.monotonic", return_value=later):
+            self.assertEqual(self.authenticated_get(cookies).status_code, 401)
+
+    def test_purge_expired_keeps_live_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(seconds=1))
+        RevokedToken.objects.create(jti="live", expires_at=now + timedelta(days=1))
+
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live"])
+
+
+def cookie_request(access_token):
+    request = RequestFactory().get("/")
+    request.COOKIES["access_token"] = str(access_token)
+    return request
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        denylist.reset()
+        user_cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", username="buyer", password="pass12345")
+        self.request = cookie_request(tokens_for_user(self.user).access_token)
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_repeat_requests_are_served_from_the_cache(self):
+        auth = CookieJWTAuthentication()
+        auth.authenticate(self.request)
+
+        with self.assertNumQueries(0):
+            user, token = auth.authenticate(self.request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_user_save_invalidates_the_cached_user(self):
+        auth = CookieJWTAuthentication()
+        auth.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate(self.request)
+
+    def test_entries_expire_after_timeout(self):
+        user_cache.set(self.user.pk, "jti", self.user)
+        self.assertEqual(user_cache.get(self.user.pk, "jti").pk, self.user.pk)
+
+        later = time.monotonic() + user_cache_config()["TIMEOUT"] + 1
+        with mock.patch("users.user_cache.time.monotonic", return_value=later):
+            self.assertIsNone(user_cache.get(self.user.pk, "jti"))
+
+    @override_settings(AUTH_USER_CACHE={"MAX_SIZE": 2})
+    def test_least_recently_used_entry_is_evicted(self):
+        user_cache.set(1, "a", self.user)
+        user_cache.set(2, "b", self.user)
+        user_cache.get(1, "a")
+        user_cache.set(3, "c", self.user)
+
+        self.assertIsNotNone(user_cache.get(1, "a"))
+        self.assertIsNone(user_cache.get(2, "b"))
+        self.assertIsNotNone(user_cache.get(3, "c"))
+
+
+class TrustedClaimsTests(TestCase):
+    def setUp(self):
+        denylist.reset()
+        user_cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", username="buyer", password="pass12345")
+        # Warm the denylist so only the user lookup is left to count
+        denylist.is_revoked()
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_claims_authenticate_without_queries(self):
+        request = cookie_request(tokens_for_user(self.user).access_token)
+
+        with self.assertNumQueries(0):
+            user, token = TrustedClaimsJWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, TrustedClaimsUser)
+        self.assertEqual((str(user.id), user.email, user.role), (str(self.user.pk), "buyer@example.com", "customer"))
+
+        # Anything beyond the claims loads the real row, once
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "buyer")
+            self.assertEqual(user.username, "buyer")
+
+    def test_tokens_without_claims_fall_back_to_the_user_lookup(self):
+        request = cookie_request(RefreshToken.for_user(self.user).access_token)
+
+        with self.assertNumQueries(1):
+            user, token = TrustedClaimsJWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.pk, self.user.pk)
@@ -0,0 +1,27 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def user_role(user):
+    return "staff" if user.is_staff else "customer"
+
+
+def add_user_claims(token, user):
+    """
+    Claims read by TrustedClaimsJWTAuthentication instead of loading the user
+    """
+    token["email"] = user.email
+    token["is_active"] = user.is_active
+    token["role"] = user_role(user)
+    return token
+
+
+def tokens_for_user(user, family=None):
+    """
+    Refresh token (and, through it, its access token) carrying the user claims.
+    `fam` ties every token rotated from one login together so the whole chain
+    can be revoked at once (users.denylist); a fresh login starts a new family.
+    """
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
+    refresh["fam"] = family or refresh[api_settings.JTI_CLAIM]
+    return refresh
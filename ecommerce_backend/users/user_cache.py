@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+DEFAULTS = {
+    "TIMEOUT": 30,           # seconds; 0 disables the cache
+    "MAX_SIZE": 1024,        # entries kept in the per-process LRU
+    "SHARED_CACHE": None,    # optional django cache alias shared between workers
+}
+SHARED_KEY = "auth-user:{}"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "AUTH_USER_CACHE", {})}
+
+
+class UserCache:
+    """
+    Size-bounded, short-TTL LRU of authenticated users keyed by (user id, token jti),
+    optionally backed by a shared django cache keyed by user id.
+
+    Entries are dropped on User save/delete (users.signals). Queryset .update()
+    bypasses signals, so TIMEOUT bounds how stale a cached user can get; other
+    workers' local entries also only expire by TIMEOUT.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, jti):
+        config = get_config()
+        if not config["TIMEOUT"]:
+            return None
+
+        key = (str(user_id), jti)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, user = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return copy.copy(user)
+                del self._entries[key]
+
+        if config["SHARED_CACHE"]:
+            user = caches[config["SHARED_CACHE"]].get(SHARED_KEY.format(user_id))
+            if user is not None:
+                self._store(key, user, config)
+                return copy.copy(user)
+        return None
+
+    def set(self, user_id, jti, user):
+        config = get_config()
+        if not config["TIMEOUT"]:
+            return
+
+        self._store((str(user_id), jti), user, config)
+        if config["SHARED_CACHE"]:
+            caches[config["SHARED_CACHE"]].set(SHARED_KEY.format(user_id), user, config["TIMEOUT"])
+
+    def _store(self, key, user, config):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + config["TIMEOUT"], copy.copy(user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > config["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+        config = get_config()
+        if config["SHARED_CACHE"]:
+            caches[config["SHARED_CACHE"]].delete(SHARED_KEY.format(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
@@ -4,9 +4,16 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .models import User
 from .serializers import RegisterSerializer, LoginSerializer, ProfileSerializer
+from .denylist import is_token_revoked, revoke_family, revoke_token
+from .tokens import tokens_for_user
 from django.conf import settings
+from cart.guest import merge_guest_cart
 
 
 class RegisterAPIView(APIView):
@@ -23,6 +30,10 @@ class RegisterAPIView(APIView):
                 )
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        except ValidationError as e:
+            # Duplicate phone caught by the unique index
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -58,6 +69,28 @@ class RegisterAPIView(APIView):
 #             )
 
 
+def set_auth_cookies(response, request, refresh):
+    # ✅ Access Token Cookie (short-lived)
+    response.set_cookie(
+        key="access_token",
+        value=str(refresh.access_token),
+        httponly=True,
+        secure=request.is_secure(),  # don't block cookies on http:// in dev
+        samesite="Lax",
+        max_age=60 * 60       # 60 minutes (align with SIMPLE_JWT)
+    )
+
+    # ✅ Refresh Token Cookie (long-lived)
+    response.set_cookie(
+        key="refresh_token",
+        value=str(refresh),
+        httponly=True,
+        secure=request.is_secure(),
+        samesite="Lax",
+        max_age=60 * 60 * 24 * 7  # 7 days
+    )
+
+
 class LoginAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -66,7 +99,7 @@ class LoginAPIView(APIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
 
         response = Response(
             {
@@ -79,26 +112,10 @@ class LoginAPIView(APIView):
             status=status.HTTP_200_OK
         )
 
-        # ✅ Access Token Cookie (short-lived)
-        response.set_cookie(
-            key="access_token",
-            value=str(refresh.access_token),
-            httponly=True,
-            secure=request.is_secure(),  # don't block cookies on http:// in dev
-            samesite="Lax",
-            max_age=60 * 60       # 60 minutes (align with SIMPLE_JWT)
-        )
-
-        # ✅ Refresh Token Cookie (long-lived)
-        response.set_cookie(
-            key="refresh_token",
-            value=str(refresh),
-            httponly=True,
-            secure=request.is_secure(),
-            samesite="Lax",
-            max_age=60 * 60 * 24 * 7  # 7 days
-        )
+        # Move anything added as a guest into the user's cart
+        merge_guest_cart(request, response, user)
 
+        set_auth_cookies(response, request, refresh)
         return response
 
 
@@ -111,7 +128,25 @@ class ProfileAPIView(APIView):
 
 
 class LogoutAPIView(APIView):
+    """
+    POST: Clear the auth cookies and revoke every token of this login session
+    (works with an expired access token, the refresh cookie is enough)
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
     def post(self, request):
+        for cookie, token_class in (("refresh_token", RefreshToken), ("access_token", AccessToken)):
+            raw_token = request.COOKIES.get(cookie)
+            if not raw_token:
+                continue
+            try:
+                token = token_class(raw_token)
+            except TokenError:
+                continue
+            revoke_family(token.get("fam") or token[api_settings.JTI_CLAIM])
+            break
+
         response = Response(
             {"message": "Logged out successfully"},
             status=status.HTTP_200_OK
@@ -122,7 +157,13 @@ class LogoutAPIView(APIView):
 
 
 class RefreshAPIView(APIView):
+    """
+    POST: Rotate the refresh cookie and issue a new access token.
+    Each refresh token is single use: presenting a rotated-out one again means
+    it leaked, so its whole login session (token family) is revoked.
+    """
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
 
     def post(self, request):
         refresh_token = request.COOKIES.get("refresh_token") or request.COOKIES.get("refresh-token")
@@ -131,17 +172,22 @@ class RefreshAPIView(APIView):
 
         try:
             refresh = RefreshToken(refresh_token)
-            access_token = str(refresh.access_token)
-        except Exception:
+        except TokenError:
+            return Response({"error": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        family = refresh.get("fam") or refresh[api_settings.JTI_CLAIM]
+        if is_token_revoked(refresh) or not revoke_token(refresh):
+            revoke_family(family)
+            response = Response({"error": "Refresh token reuse detected"}, status=status.HTTP_401_UNAUTHORIZED)
+            response.delete_cookie("access_token")
+            response.delete_cookie("refresh_token")
+            return response
+
+        # Re-stamp the trusted claims from the current user row
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
             return Response({"error": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
 
         response = Response({"message": "Token refreshed"}, status=status.HTTP_200_OK)
-        response.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            secure=request.is_secure(),
-            samesite="Lax",
-            max_age=60 * 60,
-        )
-        return response
\ No newline at end of file
+        set_auth_cookies(response, request, tokens_for_user(user, family=family))
+        return response